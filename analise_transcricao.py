@@ -0,0 +1,194 @@
+# Análise compartilhada da transcrição
+# Tokeniza o texto uma única vez; gráficos, tabelas e nuvens leem daqui
+# Requer: numpy, pandas (só para tabela_transcricao, importado sob demanda)
+
+import os
+import re
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# Timestamps no formato [MM:SS] ou [HH:MM:SS]
+PADRAO_TIMESTAMP = r'\[(?:(\d{2}):)?(\d{2}):(\d{2})\]'
+REGEX_TIMESTAMP = re.compile(PADRAO_TIMESTAMP)
+REGEX_PALAVRA = re.compile(r'\b\w+\b')
+
+# Lista de stopwords em português do NLTK, guardada no repositório para
+# nunca depender de download (nem de rede) ao iniciar
+ARQUIVO_STOPWORDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopwords_portugues.txt')
+
+@lru_cache(maxsize=None)
+def carregar_stopwords():
+    """
+    Stopwords em português (lidas uma única vez por processo)
+    """
+    with open(ARQUIVO_STOPWORDS, 'r', encoding='utf-8') as f:
+        return frozenset(linha.strip() for linha in f if linha.strip())
+
+def tabela_transcricao(linhas, falantes=None):
+    """
+    Representação em colunas da transcrição, montada numa única passada
+    vetorizada sobre todas as linhas. Colunas:
+      segundos  - segundos do primeiro timestamp da linha (-1 se não houver)
+      timestamp - o timestamp como aparece na linha ('' se não houver)
+      texto     - a linha sem timestamps
+      falante   - quem está falando (só se `falantes` for passado)
+    """
+    import pandas as pd
+    serie = pd.Series(linhas, dtype=object)
+    partes = serie.str.extract('(' + PADRAO_TIMESTAMP + ')')
+    horas, minutos, segundos = (pd.to_numeric(partes[i]) for i in (1, 2, 3))
+    tabela = pd.DataFrame({
+        'segundos': (horas.fillna(0) * 3600 + minutos * 60 + segundos).fillna(-1).astype(np.int32),
+        'timestamp': partes[0].fillna(''),
+        'texto': serie.str.replace(REGEX_TIMESTAMP, '', regex=True).str.strip(),
+    })
+    if falantes is not None:
+        tabela['falante'] = falantes
+    return tabela
+
+def palavras_da_linha(linha):
+    """
+    Todas as palavras da linha, sem o timestamp e em minúsculas
+    """
+    return REGEX_PALAVRA.findall(REGEX_TIMESTAMP.sub('', linha).lower())
+
+def tokenizar_linha(linha, stopwords_pt):
+    """
+    Remove o timestamp, passa para minúsculas e devolve as palavras
+    relevantes da linha (sem stopwords e com mais de 2 letras)
+    """
+    return [p for p in palavras_da_linha(linha) if p not in stopwords_pt and len(p) > 2]
+
+def analisar_transcricao(linhas, stopwords_pt):
+    """
+    Tokeniza todas as linhas numa única passada. Cada palavra vira um id
+    inteiro (posição no vocabulário, em ordem de primeira aparição), então
+    o texto tokenizado é só um array de inteiros.
+    Retorna um dicionário com:
+      vocabulario  - lista de palavras; vocabulario[id] é a palavra
+      ids          - palavra -> id
+      tokens       - ids das palavras relevantes, na ordem da transcrição (int32)
+      offsets      - os tokens da linha i são tokens[offsets[i]:offsets[i + 1]]
+      posicoes     - posição de cada token entre todas as palavras da transcrição
+                     (dois tokens só são vizinhos no texto se as posições forem seguidas)
+      frequencias  - frequência de cada id
+      contagem     - Counter global das palavras
+    """
+    # Primeiro todas as palavras (inclusive stopwords) viram ids; o filtro
+    # é feito depois, sobre os arrays, guardando onde cada palavra estava
+    ids = {}
+    todos = array('i')
+    offsets_todos = array('q', [0])
+    for linha in linhas:
+        # setdefault avalia len(ids) antes de inserir: palavra nova ganha o próximo id
+        todos.extend(ids.setdefault(p, len(ids)) for p in palavras_da_linha(linha))
+        offsets_todos.append(len(todos))
+    todos = np.frombuffer(todos, dtype=np.int32) if todos else np.zeros(0, dtype=np.int32)
+    offsets_todos = np.frombuffer(offsets_todos, dtype=np.int64)
+
+    # Mesmo filtro de tokenizar_linha; os ids relevantes são renumerados
+    # mantendo a ordem de primeira aparição
+    relevante = np.fromiter((p not in stopwords_pt and len(p) > 2 for p in ids), dtype=bool, count=len(ids))
+    novo_id = np.cumsum(relevante, dtype=np.int32) - 1
+    vocabulario = [p for p, r in zip(ids, relevante) if r]
+    ids = dict(zip(vocabulario, range(len(vocabulario))))
+
+    mascara = relevante[todos]
+    tokens = novo_id[todos[mascara]]
+    posicoes = np.flatnonzero(mascara).astype(np.int32)
+    offsets = np.concatenate([[0], np.cumsum(mascara, dtype=np.int64)])[offsets_todos]
+    frequencias = np.bincount(tokens, minlength=len(vocabulario))
+    return {
+        'vocabulario': vocabulario,
+        'ids': ids,
+        'tokens': tokens,
+        'offsets': offsets,
+        'posicoes': posicoes,
+        'frequencias': frequencias,
+        'contagem': contagem_ids(vocabulario, frequencias),
+    }
+
+def contagem_ids(vocabulario, frequencias):
+    """
+    Counter palavra -> frequência a partir de um vetor de frequências por id
+    (só as palavras que aparecem)
+    """
+    presentes = np.flatnonzero(frequencias)
+    return Counter(dict(zip([vocabulario[i] for i in presentes], frequencias[presentes].tolist())))
+
+def contagem_linhas(analise, inicio, fim):
+    """
+    Frequência das palavras nas linhas [inicio, fim) sem re-tokenizar o texto
+    """
+    offsets = analise['offsets']
+    trecho = analise['tokens'][offsets[inicio]:offsets[fim]]
+    return contagem_ids(analise['vocabulario'], np.bincount(trecho, minlength=len(analise['vocabulario'])))
+
+def minutos_por_linha(segundos):
+    """
+    Minuto de cada linha a partir dos segundos (-1 = sem timestamp);
+    linhas sem timestamp herdam o minuto da linha anterior
+    """
+    n = len(segundos)
+    idx = np.where(segundos >= 0, np.arange(n), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return (np.maximum(segundos[idx], 0) // 60).astype(np.int32)
+
+def acumulado_por_minuto(minutos_linha, tokens, offsets, tamanho_vocabulario):
+    """
+    Matriz (minutos + 1) x vocabulário de contagens acumuladas:
+    a linha m tem a contagem de cada palavra em todos os minutos < m.
+    tokens são os ids das palavras e offsets delimitam os tokens de cada linha
+    """
+    n_minutos = int(minutos_linha.max()) + 1 if len(minutos_linha) else 1
+    minuto_token = np.repeat(minutos_linha.astype(np.int64), np.diff(offsets))
+    matriz = np.bincount(minuto_token * tamanho_vocabulario + tokens,
+                         minlength=n_minutos * tamanho_vocabulario)
+    acumulado = np.zeros((n_minutos + 1, tamanho_vocabulario), dtype=np.int32)
+    np.cumsum(matriz.reshape(n_minutos, tamanho_vocabulario), axis=0, out=acumulado[1:])
+    return acumulado
+
+def frequencias_janela(acumulado, inicio, fim):
+    """
+    Contagem de cada palavra nos minutos [inicio, fim] com uma única subtração
+    """
+    fim = min(fim, len(acumulado) - 2)
+    inicio = max(0, min(inicio, fim + 1))
+    return acumulado[fim + 1] - acumulado[inicio]
+
+def frequencias_linhas(tokens, offsets, mascara_linhas, tamanho_vocabulario):
+    """
+    Contagem de cada palavra (por id) somando só as linhas marcadas na máscara
+    """
+    mascara_tokens = np.repeat(mascara_linhas, np.diff(offsets))
+    return np.bincount(tokens[mascara_tokens], minlength=tamanho_vocabulario)
+
+def frequencias_por_falante(tokens, offsets, falantes, n_falantes, tamanho_vocabulario):
+    """
+    Matriz falante x vocabulário com as contagens de cada falante, num único
+    bincount. falantes tem o código do falante de cada linha (-1 = nenhum)
+    """
+    falante_token = np.repeat(np.asarray(falantes, dtype=np.int64), np.diff(offsets))
+    validos = falante_token >= 0
+    chaves = falante_token[validos] * tamanho_vocabulario + tokens[validos]
+    matriz = np.bincount(chaves, minlength=n_falantes * tamanho_vocabulario)
+    return matriz.reshape(n_falantes, tamanho_vocabulario)
+
+def tempo_por_falante(segundos, falantes, n_falantes, duracao_ultima=0):
+    """
+    Segundos de fala de cada falante: cada linha com timestamp dura até o
+    timestamp seguinte (a última dura duracao_ultima) e conta para o falante
+    da linha. segundos = -1 e falante = -1 ficam de fora
+    """
+    segundos = np.asarray(segundos)
+    com_tempo = np.flatnonzero(segundos >= 0)
+    if not len(com_tempo):
+        return np.zeros(n_falantes)
+    inicio = segundos[com_tempo].astype(np.float64)
+    duracao = np.maximum(np.diff(inicio, append=inicio[-1] + duracao_ultima), 0)
+    codigos = np.asarray(falantes)[com_tempo]
+    validos = codigos >= 0
+    return np.bincount(codigos[validos], weights=duracao[validos], minlength=n_falantes)
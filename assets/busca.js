@@ -0,0 +1,215 @@
+// Busca na transcrição feita no navegador
+// As linhas chegam uma vez (URL versionada, guardada em cache pelo navegador)
+// e o índice invertido é montado aqui, com a mesma pontuação de
+// indice_busca.py. Enquanto ele não carrega, ou se a transcrição for grande
+// demais para vir ao navegador, a busca é repassada ao servidor.
+
+window.dash_clientside = window.dash_clientside || {};
+
+(function () {
+    const REGEX_PALAVRA = /[\p{L}\p{N}\p{M}_]+/gu;
+
+    let indice = null;       // {timestamps, textos, falantes, postagens: palavra -> Map(linha -> n), vocabulario}
+    let carregando = null;   // URL sendo baixada
+
+    function montarIndice(dados) {
+        const postagens = new Map();
+        dados.textos.forEach(function (texto, i) {
+            for (const palavra of texto.toLowerCase().match(REGEX_PALAVRA) || []) {
+                let linhas = postagens.get(palavra);
+                if (!linhas) {
+                    linhas = new Map();
+                    postagens.set(palavra, linhas);
+                }
+                linhas.set(i, (linhas.get(i) || 0) + 1);
+            }
+        });
+        return {
+            timestamps: dados.timestamps,
+            textos: dados.textos,
+            falantes: dados.falantes,
+            postagens: postagens,
+            vocabulario: Array.from(postagens.keys()).sort(),
+        };
+    }
+
+    function carregar(url) {
+        if (carregando === url) {
+            return;
+        }
+        carregando = url;
+        fetch(url)
+            .then(function (resposta) { return resposta.json(); })
+            .then(function (dados) { indice = montarIndice(dados); })
+            .catch(function () { carregando = null; });
+    }
+
+    // Palavra exata (1.0), prefixo (0.5) ou, se nada disso existir, trecho (0.25)
+    function palavrasDoTermo(termo) {
+        const encontradas = new Map();
+        if (indice.postagens.has(termo)) {
+            encontradas.set(termo, 1.0);
+        }
+        const vocabulario = indice.vocabulario;
+        let inicio = 0, fim = vocabulario.length;
+        while (inicio < fim) {
+            const meio = (inicio + fim) >> 1;
+            if (vocabulario[meio] < termo) { inicio = meio + 1; } else { fim = meio; }
+        }
+        for (let i = inicio; i < vocabulario.length && vocabulario[i].startsWith(termo); i++) {
+            if (!encontradas.has(vocabulario[i])) {
+                encontradas.set(vocabulario[i], 0.5);
+            }
+        }
+        if (encontradas.size === 0) {
+            for (const palavra of vocabulario) {
+                if (palavra.includes(termo)) {
+                    encontradas.set(palavra, 0.25);
+                }
+            }
+        }
+        return encontradas;
+    }
+
+    // Linhas com todos os termos, ordenadas por relevância (tf-idf);
+    // com codigoFalante >= 0, só as linhas desse falante
+    function buscar(termos, limite, codigoFalante) {
+        const nLinhas = Math.max(indice.textos.length, 1);
+        const palavras = new Set();
+        let pontuacao = null;
+        for (const termo of new Set(termos)) {
+            const pontosTermo = new Map();
+            palavrasDoTermo(termo).forEach(function (peso, palavra) {
+                palavras.add(palavra);
+                const linhas = indice.postagens.get(palavra);
+                const idf = Math.log(1 + nLinhas / linhas.size);
+                linhas.forEach(function (n, i) {
+                    if (codigoFalante < 0 || indice.falantes[i] === codigoFalante) {
+                        pontosTermo.set(i, (pontosTermo.get(i) || 0) + peso * n * idf);
+                    }
+                });
+            });
+            if (pontuacao === null) {
+                pontuacao = pontosTermo;
+            } else {
+                const juntos = new Map();
+                pontuacao.forEach(function (p, i) {
+                    if (pontosTermo.has(i)) {
+                        juntos.set(i, p + pontosTermo.get(i));
+                    }
+                });
+                pontuacao = juntos;
+            }
+            if (pontuacao.size === 0) {
+                break;
+            }
+        }
+        const melhores = Array.from(pontuacao.entries())
+            .sort(function (a, b) { return b[1] - a[1] || a[0] - b[0]; })
+            .slice(0, limite);
+        return {total: pontuacao.size, linhas: melhores.map(function (item) { return item[0]; }), palavras: palavras};
+    }
+
+    function componente(tipo, props) {
+        return {namespace: 'dash_html_components', type: tipo, props: props};
+    }
+
+    // Texto com as palavras encontradas dentro de <mark>
+    function destacar(texto, palavras) {
+        const partes = [];
+        let pos = 0;
+        for (const m of texto.matchAll(REGEX_PALAVRA)) {
+            if (palavras.has(m[0].toLowerCase())) {
+                partes.push(texto.slice(pos, m.index), componente('Mark', {children: m[0]}));
+                pos = m.index + m[0].length;
+            }
+        }
+        partes.push(texto.slice(pos));
+        return partes;
+    }
+
+    // Destaque das palavras na página visível da transcrição (CSS Custom Highlight API)
+    function destacarPagina(palavras) {
+        if (!window.CSS || !CSS.highlights) {
+            return;
+        }
+        CSS.highlights.delete('busca');
+        const caixa = document.getElementById('transcricao-box');
+        if (!palavras || !caixa) {
+            return;
+        }
+        const trechos = [];
+        const nos = document.createTreeWalker(caixa, NodeFilter.SHOW_TEXT);
+        while (nos.nextNode()) {
+            const no = nos.currentNode;
+            for (const m of no.data.matchAll(REGEX_PALAVRA)) {
+                if (palavras(m[0].toLowerCase())) {
+                    const trecho = new Range();
+                    trecho.setStart(no, m.index);
+                    trecho.setEnd(no, m.index + m[0].length);
+                    trechos.push(trecho);
+                }
+            }
+        }
+        CSS.highlights.set('busca', new Highlight(...trechos));
+    }
+
+    window.dash_clientside.busca = {
+        // Devolve [resultados, pedido para o servidor]; só um dos dois muda
+        buscar: function (termo, falante, config) {
+            const nenhuma = window.dash_clientside.no_update;
+            termo = (termo || '').trim();
+            if (termo.length < config.minimo) {
+                return ['', nenhuma];
+            }
+            if (!config.url) {
+                return [nenhuma, {termo: termo, falante: falante}];
+            }
+            if (!indice) {
+                carregar(config.url);
+                return [nenhuma, {termo: termo, falante: falante}];
+            }
+            const termos = termo.toLowerCase().match(REGEX_PALAVRA) || [];
+            const codigoFalante = config.falantes.indexOf(falante);
+            const resultado = termos.length ? buscar(termos, config.limite, codigoFalante) : {total: 0, linhas: []};
+            if (resultado.total === 0) {
+                return [componente('P', {children: 'Nenhum resultado encontrado.', style: {color: '#F76E11'}}), nenhuma];
+            }
+            const linhas = [];
+            resultado.linhas.forEach(function (i, n) {
+                if (n > 0) {
+                    linhas.push('\n');
+                }
+                const timestamp = indice.timestamps[i];
+                linhas.push(timestamp ? timestamp + ' ' : '', ...destacar(indice.textos[i], resultado.palavras));
+            });
+            const filhos = [componente('Pre', {children: linhas})];
+            if (resultado.total > resultado.linhas.length) {
+                filhos.push(componente('P', {
+                    children: 'Mostrando os ' + resultado.linhas.length + ' trechos mais relevantes de ' +
+                        resultado.total + ' encontrados.',
+                    style: {color: '#B0BEC5'},
+                }));
+            }
+            return [filhos, nenhuma];
+        },
+
+        // Destaca a busca na página da transcrição sempre que uma das duas muda
+        destacar: function (termo, _pagina, config) {
+            termo = (termo || '').trim().toLowerCase();
+            let palavras = null;
+            if (termo.length >= config.minimo) {
+                const termos = termo.match(REGEX_PALAVRA) || [];
+                if (indice) {
+                    const encontradas = new Set();
+                    termos.forEach(function (t) { palavrasDoTermo(t).forEach(function (_, p) { encontradas.add(p); }); });
+                    palavras = function (p) { return encontradas.has(p); };
+                } else {
+                    palavras = function (p) { return termos.some(function (t) { return p.startsWith(t); }); };
+                }
+            }
+            // A página nova só está no DOM depois da renderização
+            window.requestAnimationFrame(function () { destacarPagina(palavras); });
+        },
+    };
+})();
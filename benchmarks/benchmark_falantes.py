@@ -0,0 +1,76 @@
+# Benchmark da identificação de falantes
+# Compara o matcher compilado de identificar_falantes com o laço antigo
+# (um re.search por padrão e por linha) numa transcrição sintética.
+# Execute com: python benchmarks/benchmark_falantes.py [n_linhas]
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from falantes import PADROES_FALANTES, identificar_falantes
+
+PALAVRAS = ('educação universidade campus pesquisa extensão orçamento estudantes servidores '
+            'gestão transparência diálogo inovação assistência permanência qualidade ensino '
+            'proposta instituto comunidade recursos projeto futuro de que a o para não com').split()
+
+def gerar_linhas(n, seed=42):
+    """
+    Gera n linhas '[MM:SS] texto' com menções aos falantes espalhadas
+    """
+    rnd = random.Random(seed)
+    cues = [p for lista in PADROES_FALANTES.values() for p in lista]
+    linhas = []
+    for i in range(n):
+        palavras = rnd.choices(PALAVRAS, k=rnd.randint(5, 30))
+        if rnd.random() < 0.2:
+            palavras.insert(rnd.randint(0, len(palavras)), rnd.choice(cues).title())
+        m, s = divmod(i * 7, 60)
+        linhas.append(f'[{m % 100:02d}:{s:02d}] ' + ' '.join(palavras) + '\n')
+    return linhas
+
+def identificar_falantes_laco(linhas, padroes=PADROES_FALANTES):
+    """
+    Implementação original, mantida como referência
+    """
+    falas_por_candidato = {candidato: [] for candidato in padroes}
+    candidato_atual = 'mediador'
+    for linha in linhas:
+        linha_limpa = re.sub(r'\[\d{2}:\d{2}\]', '', linha).strip()
+        if not linha_limpa:
+            continue
+        for candidato, padrao_list in padroes.items():
+            for padrao in padrao_list:
+                if re.search(padrao, linha_limpa.lower()):
+                    candidato_atual = candidato
+                    break
+            if candidato_atual != 'mediador':
+                break
+        falas_por_candidato[candidato_atual].append(linha_limpa)
+    return falas_por_candidato
+
+def cronometrar(func, linhas, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func(linhas)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    linhas = gerar_linhas(n)
+
+    t_laco, ref = cronometrar(identificar_falantes_laco, linhas)
+    t_novo, novo = cronometrar(identificar_falantes, linhas)
+    assert novo == ref, 'atribuições divergentes entre o laço antigo e o matcher compilado'
+
+    print(f'{n} linhas')
+    print(f'  laço antigo:       {t_laco:.3f}s')
+    print(f'  matcher compilado: {t_novo:.3f}s')
+    print(f'  ganho:             {t_laco / t_novo:.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+# Benchmark do pipeline de análise e renderização
+# Gera transcrições sintéticas (sem rede), mede o tempo e o pico de memória
+# de cada etapa e o tamanho do layout da dashboard, e compara com a linha de
+# base guardada em benchmarks/baseline.json.
+# Execute com: python benchmarks/benchmark_pipeline.py [--linhas 1000 10000 100000] [--salvar-baseline]
+# Sai com código 1 se alguma etapa piorar além da tolerância.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ARQUIVO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analise_transcricao import analisar_transcricao, carregar_stopwords, contagem_linhas, tabela_transcricao
+from benchmark_falantes import PALAVRAS
+from cache_artefatos import PASTA_CACHE
+from falantes import PADROES_FALANTES, identificar_falantes
+from graficos import PARAMETROS_NUVEM_BLOCO, dividir_blocos, grafico_evolucao, grafico_palavras, tabela_palavras
+from renderizacao import png_nuvem
+from snapshot_analise import carregar_snapshot, construir_snapshot
+
+# Os módulos pesados são importados sob demanda pelo pipeline; importados aqui,
+# o custo do import não entra no tempo da primeira etapa que os usa
+import matplotlib.pyplot
+import pandas
+import wordcloud
+
+# Tolerâncias para considerar uma etapa pior que a linha de base
+TOLERANCIA_TEMPO = 1.5
+FOLGA_TEMPO_S = 0.05
+TOLERANCIA_MEMORIA = 1.25
+TOLERANCIA_LAYOUT = 1.10
+
+def gerar_transcricao(n, seed=42):
+    """
+    Gera n linhas com timestamp ([MM:SS] na primeira hora, [HH:MM:SS] depois)
+    e menções aos falantes espalhadas
+    """
+    import random
+    rnd = random.Random(seed)
+    cues = [p for lista in PADROES_FALANTES.values() for p in lista]
+    linhas = []
+    for i in range(n):
+        palavras = rnd.choices(PALAVRAS, k=rnd.randint(5, 30))
+        if rnd.random() < 0.2:
+            palavras.insert(rnd.randint(0, len(palavras)), rnd.choice(cues).title())
+        horas, resto = divmod(i * 7, 3600)
+        minutos, segundos = divmod(resto, 60)
+        ts = f'[{horas:02d}:{minutos:02d}:{segundos:02d}]' if horas else f'[{minutos:02d}:{segundos:02d}]'
+        linhas.append(f'{ts} ' + ' '.join(palavras).capitalize())
+    return '\n'.join(linhas) + '\n'
+
+def medir(func):
+    """
+    (segundos, pico de memória em MB, resultado) de uma chamada; o tempo vem
+    de uma execução normal e o pico de uma segunda, com tracemalloc
+    """
+    inicio = time.perf_counter()
+    resultado = func()
+    tempo = time.perf_counter() - inicio
+    tracemalloc.start()
+    func()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico / 2 ** 20, resultado
+
+def etapas(ctx):
+    """
+    Etapas na ordem do pipeline; cada uma lê e grava no dicionário ctx
+    """
+    from gerar_nuvem_por_usuario import renderizar_nuvem, stopwords_pt as stopwords_nuvem
+
+    def ler():
+        with open(ctx['arquivo'], 'r', encoding='utf-8') as f:
+            return f.read().strip().split('\n')
+
+    def nuvem_bloco():
+        bloco = dividir_blocos(range(len(ctx['linhas'])))[0]
+        return png_nuvem(contagem_linhas(ctx['analise'], bloco.start, bloco.stop), PARAMETROS_NUVEM_BLOCO)
+
+    def snapshot():
+        # Sem o cache de artefatos, para medir a construção completa
+        shutil.rmtree(PASTA_CACHE, ignore_errors=True)
+        return construir_snapshot(ctx['arquivo'], os.path.join(ctx['pasta'], 'snapshot'))
+
+    def nuvem_candidato():
+        falas = ctx['falas']['adriana'] or ctx['linhas']
+        return renderizar_nuvem(' '.join(falas), 'adriana', stopwords_nuvem)
+
+    return [
+        ('leitura', ler, 'linhas'),
+        ('identificar_falantes', lambda: identificar_falantes(ctx['linhas']), 'falas'),
+        ('analisar_transcricao', lambda: analisar_transcricao(ctx['linhas'], ctx['stopwords']), 'analise'),
+        ('tabela_transcricao', lambda: tabela_transcricao(ctx['linhas']), 'tabela'),
+        ('grafico_palavras', lambda: grafico_palavras(ctx['analise']['contagem']).to_json(), None),
+        ('tabela_palavras', lambda: tabela_palavras(ctx['analise']['contagem']), None),
+        ('grafico_evolucao', lambda: grafico_evolucao(ctx['tabela']['segundos'].to_numpy()).to_json(), None),
+        ('nuvem_bloco', nuvem_bloco, None),
+        ('gerar_nuvem_candidato', nuvem_candidato, None),
+        ('construir_snapshot', snapshot, None),
+        ('carregar_snapshot', lambda: carregar_snapshot(ctx['arquivo'], os.path.join(ctx['pasta'], 'snapshot')), None),
+    ]
+
+# Executado num processo separado, dentro da pasta do tamanho medido: importa a
+# dashboard (que carrega o snapshot) e mede o layout serializado
+CODIGO_LAYOUT = '''
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+inicio = time.perf_counter()
+import dashboard_dash
+import plotly
+importacao = time.perf_counter() - inicio
+layout = json.dumps(dashboard_dash.app.layout, cls=plotly.utils.PlotlyJSONEncoder)
+# ru_maxrss sobrevive ao exec e traria o pico do processo pai; no Linux, VmHWM é só deste processo
+try:
+    with open('/proc/self/status') as f:
+        rss_mb = next(int(l.split()[1]) for l in f if l.startswith('VmHWM')) / 1024
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({'bytes': len(layout), 'importacao_s': importacao, 'rss_mb': rss_mb}))
+'''
+
+def medir_layout(pasta):
+    # A dashboard espera data/transcricao.txt, imgs/nuvem_geral.png e o snapshot em .cache/snapshot
+    saida = subprocess.run([sys.executable, '-c', CODIGO_LAYOUT, os.path.abspath(RAIZ)], cwd=pasta,
+                           capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def rodar(pasta, n):
+    os.makedirs(os.path.join(pasta, 'data'), exist_ok=True)
+    os.makedirs(os.path.join(pasta, 'imgs'), exist_ok=True)
+    arquivo = os.path.join(pasta, 'data', 'transcricao.txt')
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        f.write(gerar_transcricao(n))
+
+    ctx = {'arquivo': arquivo, 'pasta': pasta, 'stopwords': carregar_stopwords()}
+    resultados = {}
+    for nome, func, destino in etapas(ctx):
+        tempo, pico, resultado = medir(func)
+        resultados[nome] = {'tempo_s': round(tempo, 4), 'pico_mb': round(pico, 2)}
+        if destino:
+            ctx[destino] = resultado
+        if nome == 'nuvem_bloco':
+            with open(os.path.join(pasta, 'imgs', 'nuvem_geral.png'), 'wb') as f:
+                f.write(resultado)
+
+    # Snapshot no lugar onde a dashboard procura
+    construir_snapshot(arquivo, os.path.join(pasta, '.cache', 'snapshot'))
+    layout = medir_layout(pasta)
+    resultados['layout_dashboard'] = {'tempo_s': round(layout['importacao_s'], 4),
+                                      'pico_mb': round(layout['rss_mb'], 2), 'bytes': layout['bytes']}
+    return resultados
+
+def comparar(atual, base):
+    """
+    Lista de regressões (texto) de uma execução em relação à linha de base
+    """
+    regressoes = []
+    for etapa, medidas in atual.items():
+        ref = base.get(etapa)
+        if not ref:
+            continue
+        if medidas['tempo_s'] > ref['tempo_s'] * TOLERANCIA_TEMPO + FOLGA_TEMPO_S:
+            regressoes.append(f"{etapa}: tempo {ref['tempo_s']:.3f}s -> {medidas['tempo_s']:.3f}s")
+        if medidas['pico_mb'] > ref['pico_mb'] * TOLERANCIA_MEMORIA + 1:
+            regressoes.append(f"{etapa}: memória {ref['pico_mb']:.1f}MB -> {medidas['pico_mb']:.1f}MB")
+        if 'bytes' in ref and medidas['bytes'] > ref['bytes'] * TOLERANCIA_LAYOUT:
+            regressoes.append(f"{etapa}: layout {ref['bytes']} -> {medidas['bytes']} bytes")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pipeline de análise e renderização')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='tamanhos das transcrições sintéticas (padrão: 1000 10000 100000)')
+    parser.add_argument('--salvar-baseline', action='store_true', help='grava os resultados como nova linha de base')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(ARQUIVO_BASELINE):
+        with open(ARQUIVO_BASELINE, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    maquina = {'python': platform.python_version(), 'plataforma': platform.platform(), 'cpu': platform.processor()}
+    if baseline and baseline.get('maquina') != maquina:
+        print('Aviso: a linha de base foi gerada em outra máquina; compare os tempos com cuidado.\n')
+
+    # Tudo (transcrição, snapshot, cache de artefatos, imagens) é gerado numa
+    # pasta temporária, para o cache de uma execução não mascarar a seguinte;
+    # ela é apagada mesmo se alguma etapa falhar
+    pasta_trabalho = tempfile.mkdtemp(prefix='benchmark-pipeline-')
+    pasta_original = os.getcwd()
+    os.chdir(pasta_trabalho)
+    resultados = {}
+    regressoes = []
+    try:
+        for n in args.linhas:
+            pasta = os.path.join(pasta_trabalho, f'n{n}')
+            try:
+                resultados[str(n)] = rodar(pasta, n)
+            finally:
+                shutil.rmtree(pasta, ignore_errors=True)
+            base = baseline.get('resultados', {}).get(str(n), {})
+            print(f'{n} linhas')
+            print(f"  {'etapa':<24}{'tempo':>10}{'pico':>11}{'base':>10}")
+            for etapa, medidas in resultados[str(n)].items():
+                ref = base.get(etapa)
+                comparacao = f"{ref['tempo_s']:>9.3f}s" if ref else f"{'-':>10}"
+                extra = f"  ({medidas['bytes'] / 1024:.1f} KB de layout)" if 'bytes' in medidas else ''
+                print(f"  {etapa:<24}{medidas['tempo_s']:>9.3f}s{medidas['pico_mb']:>9.1f}MB{comparacao}{extra}")
+            regressoes += [f'{n} linhas - {r}' for r in comparar(resultados[str(n)], base)]
+            print()
+    finally:
+        os.chdir(pasta_original)
+        shutil.rmtree(pasta_trabalho, ignore_errors=True)
+
+    if args.salvar_baseline:
+        baseline = {'maquina': maquina, 'resultados': {**baseline.get('resultados', {}), **resultados}}
+        with open(ARQUIVO_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f'Linha de base gravada em {ARQUIVO_BASELINE}')
+    elif regressoes:
+        print('Regressões em relação à linha de base:')
+        for r in regressoes:
+            print(f'  - {r}')
+        sys.exit(1)
+    elif baseline:
+        print('Nenhuma regressão em relação à linha de base.')
+
+if __name__ == '__main__':
+    main()
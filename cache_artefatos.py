@@ -0,0 +1,102 @@
+# Cache em disco de artefatos gerados (nuvens, figuras, tabelas)
+# Compartilhado por dashboard_dash.py e gerar_nuvem_por_usuario.py
+# A chave é o hash do conteúdo da transcrição + os parâmetros de renderização,
+# então entradas iguais custam só um hash e a leitura de um arquivo.
+
+import hashlib
+import json
+import os
+import tempfile
+
+PASTA_CACHE = os.environ.get('CACHE_ARTEFATOS', os.path.join('.cache', 'artefatos'))
+LIMITE_CACHE_BYTES = int(os.environ.get('CACHE_LIMITE_MB', '256')) * 1024 * 1024
+
+def hash_conteudo(*partes):
+    """
+    Hash SHA-256 (hex) de textos ou bytes
+    """
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, str):
+            parte = parte.encode('utf-8')
+        h.update(parte)
+        h.update(b'\0')
+    return h.hexdigest()
+
+def chave_artefato(hash_entrada, nome, parametros=None):
+    """
+    Chave do artefato: hash da entrada + nome + parâmetros de renderização
+    """
+    return hash_conteudo(hash_entrada, nome, json.dumps(parametros or {}, sort_keys=True, default=str))
+
+def _caminho(chave):
+    return os.path.join(PASTA_CACHE, chave[:2], chave)
+
+def ler_artefato(chave):
+    """
+    Devolve os bytes guardados para a chave, ou None se não existirem
+    """
+    caminho = _caminho(chave)
+    try:
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+    except FileNotFoundError:
+        return None
+    # Atualiza o horário de acesso para a remoção LRU
+    try:
+        os.utime(caminho)
+    except OSError:
+        pass
+    return dados
+
+def gravar_artefato(chave, dados):
+    """
+    Grava os bytes de forma atômica e remove os artefatos mais antigos
+    se o cache passar do limite de tamanho
+    """
+    caminho = _caminho(chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(dados)
+    os.replace(temporario, caminho)
+    limpar_cache()
+
+def artefato(chave, gerar):
+    """
+    Devolve os bytes do cache; só chama gerar() (que deve devolver bytes) se faltar
+    """
+    dados = ler_artefato(chave)
+    if dados is None:
+        dados = gerar()
+        gravar_artefato(chave, dados)
+    return dados
+
+def limpar_cache(limite=None):
+    """
+    Remove os artefatos usados há mais tempo até o cache caber no limite
+    """
+    limite = LIMITE_CACHE_BYTES if limite is None else limite
+    arquivos = []
+    total = 0
+    for raiz, _, nomes in os.walk(PASTA_CACHE):
+        for nome in nomes:
+            if nome.endswith('.tmp'):
+                continue
+            caminho = os.path.join(raiz, nome)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, caminho))
+            total += info.st_size
+    if total <= limite:
+        return
+    for _, tamanho, caminho in sorted(arquivos):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+        if total <= limite:
+            break
@@ -0,0 +1,169 @@
+# Corpus com vários debates
+# Cada debate fica numa pasta própria dentro de data/debates:
+#   data/debates/<nome>/transcricao.txt
+#   data/debates/<nome>/falantes.json   (opcional; padrões de falantes, mediador primeiro)
+# As contagens de cada debate são calculadas uma vez e guardadas no cache de
+# artefatos (chave = hash da transcrição + padrões), então incluir um debate
+# novo só processa aquele arquivo. Rankings e comparações entre debates são
+# somas dos contadores já prontos.
+# Execute com: python corpus_debates.py [--pasta data/debates] [--jobs N] [--top 20]
+# Requer: pandas
+
+import argparse
+import json
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import pandas as pd
+
+from analise_transcricao import carregar_stopwords
+from cache_artefatos import chave_artefato, gravar_artefato, hash_conteudo, ler_artefato
+from falantes import PADROES_FALANTES, carregar_padroes, compilar_padroes
+from processamento_streaming import contar_streaming
+
+PASTA_DEBATES = os.path.join('data', 'debates')
+VERSAO_CONTAGENS = 1
+
+def listar_debates(pasta=PASTA_DEBATES):
+    """
+    Debates encontrados na pasta, em ordem de nome: cada um é um dicionário
+    com nome, caminho da transcrição e padrões de falantes (lista vazia se
+    a pasta não existir)
+    """
+    if not os.path.isdir(pasta):
+        return []
+    debates = []
+    for nome in sorted(os.listdir(pasta)):
+        transcricao = os.path.join(pasta, nome, 'transcricao.txt')
+        if not os.path.isfile(transcricao):
+            continue
+        arquivo_padroes = os.path.join(pasta, nome, 'falantes.json')
+        padroes = carregar_padroes(arquivo_padroes) if os.path.isfile(arquivo_padroes) else PADROES_FALANTES
+        debates.append({'nome': nome, 'transcricao': transcricao, 'padroes': padroes})
+    return debates
+
+def _chave_debate(debate, hash_stopwords):
+    with open(debate['transcricao'], 'rb') as f:
+        hash_entrada = hash_conteudo(f.read(), json.dumps(debate['padroes'], ensure_ascii=False))
+    return chave_artefato(hash_entrada, 'contagens_debate', {'versao': VERSAO_CONTAGENS, 'stopwords': hash_stopwords})
+
+def contar_debate(transcricao, padroes, stopwords_pt):
+    """
+    Contagens de um debate, num formato que vai para JSON
+    """
+    resultado = contar_streaming(transcricao, stopwords_pt, padroes, compilar_padroes(padroes))
+    return {
+        'contagem': dict(resultado['contagem']),
+        'contagem_falantes': {f: dict(c) for f, c in resultado['contagem_falantes'].items()},
+        'falas': dict(resultado['falas']),
+        'n_linhas': len(resultado['offsets']),
+    }
+
+def carregar_corpus(pasta=PASTA_DEBATES, jobs=1):
+    """
+    Contagens de todos os debates da pasta: nome -> {contagem, contagem_falantes,
+    falas, n_linhas}, com Counters. Só os debates novos ou alterados são processados
+    """
+    stopwords_pt = carregar_stopwords()
+    hash_stopwords = hash_conteudo(*sorted(stopwords_pt))
+    debates = listar_debates(pasta)
+    chaves = [_chave_debate(d, hash_stopwords) for d in debates]
+    guardados = [ler_artefato(chave) for chave in chaves]
+    faltando = [i for i, dados in enumerate(guardados) if dados is None]
+
+    transcricoes = [debates[i]['transcricao'] for i in faltando]
+    padroes = [debates[i]['padroes'] for i in faltando]
+    # Os debates são independentes; com jobs > 1 vão para um pool de processos
+    if jobs > 1 and len(faltando) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(faltando))) as pool:
+            novos = list(pool.map(contar_debate, transcricoes, padroes, repeat(stopwords_pt)))
+    else:
+        novos = [contar_debate(t, p, stopwords_pt) for t, p in zip(transcricoes, padroes)]
+    for i, contagens in zip(faltando, novos):
+        guardados[i] = json.dumps(contagens, ensure_ascii=False).encode('utf-8')
+        gravar_artefato(chaves[i], guardados[i])
+
+    corpus = {}
+    for debate, dados in zip(debates, guardados):
+        contagens = json.loads(dados)
+        corpus[debate['nome']] = {
+            'contagem': Counter(contagens['contagem']),
+            'contagem_falantes': {f: Counter(c) for f, c in contagens['contagem_falantes'].items()},
+            'falas': Counter(contagens['falas']),
+            'n_linhas': contagens['n_linhas'],
+        }
+    return corpus
+
+def contagem_corpus(corpus, debates=None, falante=None):
+    """
+    Soma das contagens dos debates escolhidos (todos, se None),
+    opcionalmente só das falas de um falante
+    """
+    total = Counter()
+    for nome in debates or corpus:
+        contagens = corpus[nome]
+        total.update(contagens['contagem'] if falante is None else contagens['contagem_falantes'].get(falante, {}))
+    return total
+
+def comparar_debates(corpus, palavras):
+    """
+    Tabela debate x palavra com a frequência de cada palavra por mil palavras do debate
+    """
+    linhas = {}
+    for nome, contagens in corpus.items():
+        total = sum(contagens['contagem'].values()) or 1
+        linhas[nome] = {p: 1000 * contagens['contagem'][p] / total for p in palavras}
+    return pd.DataFrame.from_dict(linhas, orient='index', columns=list(palavras))
+
+def palavras_caracteristicas(corpus, nome, limite=20, minimo=3):
+    """
+    Palavras usadas proporcionalmente mais neste debate do que no resto do
+    corpus (razão logarítmica das frequências, com suavização de +1)
+    """
+    contagem = corpus[nome]['contagem']
+    resto = contagem_corpus(corpus)
+    resto.subtract(contagem)
+    total_debate = sum(contagem.values())
+    total_resto = sum(resto.values())
+    vocabulario = len(resto | contagem)
+    pontos = {
+        p: math.log((n + 1) / (total_debate + vocabulario)) - math.log((resto[p] + 1) / (total_resto + vocabulario))
+        for p, n in contagem.items() if n >= minimo
+    }
+    return sorted(pontos.items(), key=lambda item: (-item[1], item[0]))[:limite]
+
+def main():
+    parser = argparse.ArgumentParser(description='Rankings e comparações entre vários debates')
+    parser.add_argument('--pasta', default=PASTA_DEBATES, help='pasta com uma subpasta por debate')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='número de processos para processar os debates em paralelo (padrão: 1)')
+    parser.add_argument('--top', type=int, default=20, help='tamanho dos rankings')
+    args = parser.parse_args()
+
+    corpus = carregar_corpus(args.pasta, args.jobs)
+    if not corpus:
+        print(f"Nenhum debate encontrado em {args.pasta}")
+        return
+
+    geral = contagem_corpus(corpus)
+    print(f"Corpus: {len(corpus)} debates, {sum(geral.values())} palavras\n")
+    print("Palavras mais frequentes no corpus:")
+    for palavra, n in geral.most_common(args.top):
+        print(f"  {palavra}: {n}")
+
+    for nome, contagens in corpus.items():
+        falas = ', '.join(f'{f.title()}: {n}' for f, n in contagens['falas'].items())
+        print(f"\n{nome} ({contagens['n_linhas']} linhas; {falas})")
+        caracteristicas = palavras_caracteristicas(corpus, nome, args.top) if len(corpus) > 1 else []
+        print("  Mais frequentes: " + ', '.join(p for p, _ in contagens['contagem'].most_common(args.top)))
+        if caracteristicas:
+            print("  Características:  " + ', '.join(p for p, _ in caracteristicas))
+
+    print("\nComparação (por mil palavras):")
+    print(comparar_debates(corpus, [p for p, _ in geral.most_common(10)]).round(2).to_string())
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,51 @@
 # Dashboard profissional com Dash (Plotly)
 # Execute com: python dashboard_dash.py
-# Requer: dash, dash-bootstrap-components, plotly, pillow, nltk
+# Requer: dash[diskcache], dash-bootstrap-components, plotly, pillow
 
+# Com PERFIL_INICIO=1 mede as fases da inicialização e os imports (vem antes dos demais)
+from perfil_inicio import marcar_fase, relatorio_inicio
+import os
 import dash
+import diskcache
 from dash import html, dcc
-from dash import dash_table, Input, Output
+from dash import dash_table, ClientsideFunction, DiskcacheManager, Input, Output, State
 import dash_bootstrap_components as dbc
-import plotly.graph_objects as go
-import pandas as pd
+import gzip
+import json
 import numpy as np
-import nltk
-import re
 from collections import Counter
-import base64
-from wordcloud import WordCloud
-from nltk.corpus import stopwords
+from functools import lru_cache
+from flask import Response, abort, request
+from analise_transcricao import (REGEX_PALAVRA, REGEX_TIMESTAMP, carregar_stopwords, frequencias_janela, frequencias_linhas,
+                                 frequencias_por_falante, tempo_por_falante)
+from cache_artefatos import artefato, chave_artefato
+from graficos import PARAMETROS_NUVEM_BLOCO, grafico_falas_por_minuto, grafico_palavras, grafico_tempo_falantes
+from indice_busca import LIMITE_RESULTADOS, buscar, construir_indice, indice_cliente, palavras_da_consulta
+from metricas import registrar_metricas
+from ngramas import ORDENS, expressoes_principais, ngramas_snapshot
+from ranking_palavras import construir_ranking, pagina_ranking
+from renderizacao import png_nuvem
+from rotas_arquivos import ROTA_DOWNLOAD, ROTA_IMAGENS, registrar_imagem, registrar_rotas, responder_artefato
+from snapshot_analise import NOME_NUVEM_DEBATE, NOMES_BLOCOS, carregar_snapshot
+from transcricao_ao_vivo import AcompanhamentoTranscricao
+marcar_fase('imports')
+
+# Callbacks pesados (renderização de nuvens) rodam em segundo plano, fora do
+# processo do servidor. O diskcache só leva o resultado de cada execução até
+# o navegador (sem cache_by, nada é memoizado): as nuvens ficam memoizadas
+# apenas no cache de artefatos, o mesmo que as rotas de imagem leem, então
+# um callback nunca devolve a URL de uma imagem que já foi descartada
+PASTA_CALLBACKS = os.path.join('.cache', 'callbacks')
+LIMITE_CALLBACKS_BYTES = 64 * 1024 * 1024
+cache_callbacks = diskcache.Cache(PASTA_CALLBACKS, size_limit=LIMITE_CALLBACKS_BYTES,
+                                  eviction_policy='least-recently-used')
+gerenciador_background = DiskcacheManager(cache_callbacks)
 
 # Adiciona CSS customizado para visual moderno e responsivo
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG, "https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap", "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.5/font/bootstrap-icons.css"])
+app = dash.Dash(__name__, background_callback_manager=gerenciador_background, external_stylesheets=[dbc.themes.CYBORG, "https://fonts.googleapis.com/css2?family=Poppins:wght@400;600&display=swap", "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.5/font/bootstrap-icons.css"])
 app.title = 'Dashboard Debate IFES'
+# Aplicação WSGI, para servidores como o gunicorn (veja servidor_producao.py)
+server = app.server
 
 app.index_string = '''
 <!DOCTYPE html>
@@ -82,6 +109,23 @@ app.index_string = '''
                 font-size: 1.3em;
                 margin-left: 0.5em;
             }
+            #resultado-busca pre {
+                background-color: #23272F;
+                color: #F5F6FA;
+                padding: 10px;
+                border-radius: 8px;
+                font-size: 1em;
+            }
+            #resultado-busca mark {
+                background: #a259f7;
+                color: #fff;
+                padding: 0 0.1em;
+                border-radius: 3px;
+            }
+            ::highlight(busca) {
+                background-color: #a259f7;
+                color: #fff;
+            }
             .transcricao-box {
                 max-height: 300px;
                 overflow-y: auto;
@@ -141,138 +185,263 @@ app.index_string = '''
 </html>
 '''
 
-def carregar_transcricao():
-    with open('data/transcricao.txt', 'r', encoding='utf-8') as f:
-        return f.read()
+ARQUIVO_TRANSCRICAO = 'data/transcricao.txt'
 
-def get_nuvem_base64():
+# Modo ao vivo (DASHBOARD_AO_VIVO=1): acompanha a transcrição enquanto ela é
+# escrita, consultando o arquivo a cada INTERVALO_AO_VIVO_MS milissegundos
+AO_VIVO = os.environ.get('DASHBOARD_AO_VIVO') == '1'
+INTERVALO_AO_VIVO_MS = int(os.environ.get('DASHBOARD_INTERVALO_MS', 5000))
+
+# Imagens e download são servidos por rotas do Flask, fora do layout
+registrar_rotas(app.server, ARQUIVO_TRANSCRICAO)
+# Latência, tamanho das respostas e erros de cada callback/rota em /metrics
+registrar_metricas(app)
+marcar_fase('app Dash, rotas e cache de callbacks')
+
+def get_nuvem_geral():
     with open('imgs/nuvem_geral.png', 'rb') as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
-def grafico_palavras(transcricao):
-    nltk.download('stopwords', quiet=True)
-    stopwords_pt = set(stopwords.words('portuguese'))
-    texto_limpo = re.sub(r'\[\d{2}:\d{2}\]', '', transcricao)
-    palavras = re.findall(r'\b\w+\b', texto_limpo.lower())
-    palavras_filtradas = [p for p in palavras if p not in stopwords_pt and len(p) > 2]
-    contagem = Counter(palavras_filtradas)
-    mais_comuns = contagem.most_common(20)
-    if mais_comuns:
-        palavras_, freq_ = zip(*mais_comuns)
-        fig = go.Figure(go.Bar(
-            x=freq_,
-            y=palavras_,
-            orientation='h',
-            marker=dict(color='#4F8DFD'),
-            hoverinfo='x+y',
-        ))
-        fig.update_layout(
-            height=400,
-            plot_bgcolor='#23272F',
-            paper_bgcolor='#18191A',
-            font=dict(color='#F5F6FA', size=16),
-            margin=dict(l=80, r=20, t=40, b=40),
-            xaxis=dict(title='Frequência', color='#F5F6FA', showgrid=False),
-            yaxis=dict(title='', color='#F5F6FA', showgrid=False, autorange='reversed'),
-            showlegend=False
-        )
-        return fig
-    else:
-        return go.Figure()
-
-def dividir_blocos(linhas):
-    n = len(linhas)
-    bloco1 = linhas[:n//3]
-    bloco2 = linhas[n//3:2*n//3]
-    bloco3 = linhas[2*n//3:]
-    return bloco1, bloco2, bloco3
-
-def grafico_evolucao(linhas):
-    minutos = []
-    for l in linhas:
-        ts = re.findall(r'\[(\d{2}):(\d{2})\]', l)
-        if ts:
-            m, s = map(int, ts[0])
-            minutos.append(m)
-    if not minutos:
-        return go.Figure()
-    contagem = pd.Series(minutos).value_counts().sort_index()
-    fig = go.Figure(go.Scatter(
-        x=contagem.index,
-        y=contagem.values,
-        mode='lines+markers',
-        line=dict(color='#A259F7', width=3),
-        marker=dict(size=8, color='#F76E11')
-    ))
-    fig.update_layout(
-        title='Evolução Temporal: Falas por Minuto',
-        xaxis_title='Minuto',
-        yaxis_title='Nº de Falas',
-        plot_bgcolor='#23272F',
-        paper_bgcolor='#18191A',
-        font=dict(color='#F5F6FA'),
-        margin=dict(l=40, r=20, t=40, b=40)
-    )
-    return fig
-
-def duracao_media(linhas):
-    tempos = []
-    for l in linhas:
-        ts = re.findall(r'\[(\d{2}):(\d{2})\]', l)
-        if ts:
-            m, s = map(int, ts[0])
-            tempos.append(m*60+s)
-    if len(tempos) < 2:
-        return 0
-    diffs = np.diff(tempos)
-    return np.mean(diffs)
-
-def nuvem_bloco(linhas_bloco, nome_arquivo):
-    nltk.download('stopwords', quiet=True)
-    stopwords_pt = set(stopwords.words('portuguese'))
-    texto = ' '.join([re.sub(r'\[\d{2}:\d{2}\]', '', l) for l in linhas_bloco])
-    wc = WordCloud(width=1200, height=600, background_color='#18191A', colormap='plasma', stopwords=stopwords_pt,
-                  max_words=150, min_font_size=10, prefer_horizontal=0.95, relative_scaling=0.5).generate(texto)
-    wc.to_file(nome_arquivo)
-    with open(nome_arquivo, 'rb') as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
-def tabela_palavras(transcricao):
-    nltk.download('stopwords', quiet=True)
-    stopwords_pt = set(stopwords.words('portuguese'))
-    texto_limpo = re.sub(r'\[\d{2}:\d{2}\]', '', transcricao)
-    palavras = re.findall(r'\b\w+\b', texto_limpo.lower())
-    palavras_filtradas = [p for p in palavras if p not in stopwords_pt and len(p) > 2]
-    contagem = Counter(palavras_filtradas)
-    df = pd.DataFrame(contagem.items(), columns=['Palavra', 'Frequência']).sort_values('Frequência', ascending=False)
-    return df
-
-def busca_transcricao(linhas, termo):
-    termo = termo.lower()
-    return [l for l in linhas if termo in l.lower()]
+        return img_file.read()
+
+def busca_transcricao(indice, termo, mascara=None):
+    # Consulta o índice invertido montado na inicialização (resultados limitados)
+    return buscar(indice, termo, mascara=mascara)
+
+def texto_destacado(texto, palavras):
+    # Texto com as palavras encontradas na busca dentro de <mark>
+    partes, pos = [], 0
+    for m in REGEX_PALAVRA.finditer(texto):
+        if m.group(0).lower() in palavras:
+            partes += [texto[pos:m.start()], html.Mark(m.group(0))]
+            pos = m.end()
+    partes.append(texto[pos:])
+    return partes
+
+def separar_fala(linha):
+    # (timestamp, texto) de uma linha com timestamp
+    return REGEX_TIMESTAMP.search(linha).group(0), REGEX_TIMESTAMP.sub('', linha).strip()
+
+def div_fala(ts, texto):
+    return html.Div([
+        html.Span(ts, style={'color': '#a259f7', 'fontWeight': 'bold', 'marginRight': '0.5em'}),
+        html.Span(texto, style={'color': '#F5F6FA'})
+    ], style={'marginBottom': '0.7em', 'padding': '0.5em 0.7em', 'background': '#222', 'borderRadius': '8px', 'display': 'flex', 'alignItems': 'baseline'})
 
 def gerar_download(texto):
     return dict(content=texto, filename="transcricao_debate.txt")
 
-transcricao = carregar_transcricao()
-linhas = transcricao.strip().split('\n')
-nuvem_base64 = get_nuvem_base64()
-fig_palavras = grafico_palavras(transcricao)
-
 # --- Preparação dos dados ---
-bloco1, bloco2, bloco3 = dividir_blocos(linhas)
-nuvem1 = nuvem_bloco(bloco1, 'imgs/nuvem_bloco1.png')
-nuvem2 = nuvem_bloco(bloco2, 'imgs/nuvem_bloco2.png')
-nuvem3 = nuvem_bloco(bloco3, 'imgs/nuvem_bloco3.png')
-fig_evolucao = grafico_evolucao(linhas)
-duracao = duracao_media(linhas)
-df_palavras = tabela_palavras(transcricao)
+# Toda a análise vem do snapshot (refeito só quando a transcrição muda)
+snapshot = carregar_snapshot(ARQUIVO_TRANSCRICAO)
+marcar_fase('snapshot')
+linhas = snapshot['linhas']
+url_nuvem_geral = registrar_imagem('nuvem_geral', get_nuvem_geral())
+fig_palavras = snapshot['fig_palavras']
+nuvem1, nuvem2, nuvem3 = [registrar_imagem(nome, snapshot['nuvens'][nome]) for nome in NOMES_BLOCOS]
+url_nuvem_debate = registrar_imagem(NOME_NUVEM_DEBATE, snapshot['nuvens'][NOME_NUVEM_DEBATE])
+fig_evolucao = snapshot['fig_evolucao']
+duracao = snapshot['meta']['duracao_media']
+# Ranking de palavras paginado no servidor: o navegador só recebe a página visível
+ranking_geral = construir_ranking(snapshot['vocabulario'], snapshot['contagens'], snapshot['ordem_alfabetica'])
+PALAVRAS_POR_PAGINA = 10
+
+# O índice de busca só é montado na primeira consulta
+indice_busca = None
+
+def obter_indice_busca():
+    global indice_busca
+    if indice_busca is None:
+        indice_busca = construir_indice(linhas)
+    return indice_busca
+
+# Busca no navegador (assets/busca.js): se a transcrição couber no limite, as
+# linhas vão uma vez para o navegador, numa URL versionada pelo hash, e as
+# buscas não passam mais pelo servidor. Acima do limite, ou até as linhas
+# chegarem, a busca continua no servidor. O campo só dispara depois de
+# ESPERA_BUSCA_S sem digitar e com pelo menos MINIMO_CARACTERES_BUSCA
+LIMITE_INDICE_CLIENTE = 2 * 1024 * 1024
+MINIMO_CARACTERES_BUSCA = 2
+ESPERA_BUSCA_S = 0.3
+ROTA_INDICE_CLIENTE = '/dados/indice-busca.json'
+VERSAO_INDICE_CLIENTE = 2  # muda junto com o formato de indice_cliente
+versao_indice_cliente = f"{snapshot['meta']['hash'][:12]}.{VERSAO_INDICE_CLIENTE}"
+url_indice_cliente = None
+if len(snapshot['texto']) <= LIMITE_INDICE_CLIENTE:
+    url_indice_cliente = f'{ROTA_INDICE_CLIENTE}?v={versao_indice_cliente}'
+indice_cliente_gzip = None
+
+def obter_indice_cliente():
+    global indice_cliente_gzip
+    if indice_cliente_gzip is None:
+        dados = json.dumps(indice_cliente(obter_indice_busca(), snapshot['falantes']), ensure_ascii=False,
+                           separators=(',', ':'))
+        indice_cliente_gzip = gzip.compress(dados.encode('utf-8'))
+    return indice_cliente_gzip
+
+@app.server.route(ROTA_INDICE_CLIENTE)
+def servir_indice_cliente():
+    if url_indice_cliente is None:
+        abort(404)
+    comprimido = obter_indice_cliente()
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        resposta = Response(comprimido, mimetype='application/json')
+        resposta.headers['Content-Encoding'] = 'gzip'
+    else:
+        resposta = Response(gzip.decompress(comprimido), mimetype='application/json')
+    resposta.set_etag(versao_indice_cliente)
+    resposta.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    resposta.vary.add('Accept-Encoding')
+    return resposta.make_conditional(request)
+
+# Transcrição paginada: o layout não carrega as falas, só a página visível
+LINHAS_POR_PAGINA = 50
+linhas_com_timestamp = np.flatnonzero(snapshot['segundos'] >= 0)
+total_paginas = max(1, -(-len(linhas_com_timestamp) // LINHAS_POR_PAGINA))
+
+# Intervalo de tempo: as frequências de qualquer janela [inicio, fim] (em
+# minutos) saem das contagens acumuladas por minuto do snapshot
+ultimo_minuto = len(snapshot['acumulado_minutos']) - 2
+passo_marcas = max(1, ultimo_minuto // 10)
+marcas_minutos = {m: f'{m}min' for m in range(0, ultimo_minuto + 1, passo_marcas)}
+
+def ranking_intervalo(inicio, fim, limite=None):
+    # Palavras do intervalo e suas frequências, da mais para a menos frequente
+    vetor = frequencias_janela(snapshot['acumulado_minutos'], inicio, fim)
+    idx = np.flatnonzero(vetor)
+    idx = idx[np.argsort(-vetor[idx], kind='stable')][:limite]
+    return snapshot['vocabulario'][idx], vetor[idx]
+
+@lru_cache(maxsize=32)
+def ranking_tabela(inicio, fim):
+    # Ranking do intervalo para a tabela; o debate inteiro usa o ranking do snapshot
+    if inicio <= 0 and fim >= ultimo_minuto:
+        return ranking_geral
+    return construir_ranking(*ranking_intervalo(inicio, fim))
+
+def chave_nuvem_intervalo(inicio, fim):
+    return chave_artefato(snapshot['meta']['hash'], 'nuvem_intervalo', {**PARAMETROS_NUVEM_BLOCO, 'minutos': [inicio, fim]})
+
+def png_nuvem_intervalo(inicio, fim):
+    # PNG da nuvem (do cache de artefatos, ou renderizado agora); None se não houver palavras
+    palavras, freq = ranking_intervalo(inicio, fim, PARAMETROS_NUVEM_BLOCO['max_words'])
+    if not len(palavras):
+        return None
+    return artefato(chave_nuvem_intervalo(inicio, fim),
+                    lambda: png_nuvem(dict(zip(palavras.tolist(), freq.tolist())), PARAMETROS_NUVEM_BLOCO))
+
+@app.server.route(f'{ROTA_IMAGENS}/intervalo/<int:inicio>/<int:fim>')
+def nuvem_intervalo(inicio, fim):
+    # A nuvem do intervalo é gerada pelo callback em segundo plano; a rota só
+    # serve o que já está no cache de artefatos
+    return responder_artefato(chave_nuvem_intervalo(inicio, fim))
+
+# Nuvem por falante: gerada por um callback em segundo plano; a imagem vai
+# para o cache de artefatos (em disco) e a rota só a lê de lá
+FALANTES = snapshot['meta']['falantes']
+TODOS_FALANTES = 'todos'
+
+# Índice por falante, montado uma vez: as linhas de cada um (máscara por
+# linha), as contagens de palavras e o tempo de fala. Trocar de falante é
+# uma consulta a estes dicionários, sem percorrer a transcrição de novo
+LINHAS_FALANTE = {f: np.asarray(snapshot['falantes']) == i for i, f in enumerate(FALANTES)}
+FALAS_FALANTE = {f: int(linhas_f.sum()) for f, linhas_f in LINHAS_FALANTE.items()}
+_frequencias_falantes = frequencias_por_falante(snapshot['tokens'], snapshot['offsets_tokens'], snapshot['falantes'],
+                                                len(FALANTES), len(snapshot['vocabulario']))
+FREQUENCIAS_FALANTE = dict(zip(FALANTES, _frequencias_falantes))
+TEMPO_FALANTE = dict(zip(FALANTES, tempo_por_falante(snapshot['segundos'], snapshot['falantes'], len(FALANTES),
+                                                     duracao).tolist()))
+
+@lru_cache(maxsize=None)
+def figura_tempo_falantes(destaque):
+    return grafico_tempo_falantes([f.title() for f in FALANTES], list(TEMPO_FALANTE.values()),
+                                  list(FALAS_FALANTE.values()), destaque.title())
+
+@lru_cache(maxsize=None)
+def figura_palavras_falante(falante):
+    vetor = FREQUENCIAS_FALANTE[falante]
+    idx = np.argsort(-vetor, kind='stable')[:20]
+    idx = idx[vetor[idx] > 0]
+    return grafico_palavras(Counter(dict(zip(snapshot['vocabulario'][idx].tolist(), vetor[idx].tolist()))))
+
+# Expressões (bigramas e trigramas) do debate ou de um falante: calculadas na
+# primeira consulta, guardadas no cache de artefatos e mantidas em memória
+EXPRESSOES_POR_TABELA = 20
+
+@lru_cache(maxsize=16)
+def estatisticas_expressoes(falante, n):
+    return ngramas_snapshot(snapshot, n, None if falante == TODOS_FALANTES else falante)
+
+def ranking_falante(falante, inicio, fim, limite=None):
+    # Palavras das falas de um falante (ou de todos) nos minutos [inicio, fim]
+    if inicio <= 0 and fim >= ultimo_minuto and falante != TODOS_FALANTES:
+        # O debate inteiro já está contado no índice por falante
+        vetor = FREQUENCIAS_FALANTE[falante]
+    else:
+        mascara = (snapshot['minutos'] >= inicio) & (snapshot['minutos'] <= fim)
+        if falante != TODOS_FALANTES:
+            mascara &= LINHAS_FALANTE[falante]
+        vetor = frequencias_linhas(snapshot['tokens'], snapshot['offsets_tokens'], mascara, len(snapshot['vocabulario']))
+    idx = np.flatnonzero(vetor)
+    idx = idx[np.argsort(-vetor[idx], kind='stable')][:limite]
+    return snapshot['vocabulario'][idx], vetor[idx]
+
+def chave_nuvem_falante(falante, inicio, fim):
+    return chave_artefato(snapshot['meta']['hash'], 'nuvem_falante',
+                          {**PARAMETROS_NUVEM_BLOCO, 'falante': falante, 'minutos': [inicio, fim]})
+
+def png_nuvem_falante(falante, inicio, fim):
+    # PNG da nuvem (do cache de artefatos, ou renderizado agora); None se não houver palavras
+    palavras, freq = ranking_falante(falante, inicio, fim, PARAMETROS_NUVEM_BLOCO['max_words'])
+    if not len(palavras):
+        return None
+    return artefato(chave_nuvem_falante(falante, inicio, fim),
+                    lambda: png_nuvem(dict(zip(palavras.tolist(), freq.tolist())), PARAMETROS_NUVEM_BLOCO))
+
+@app.server.route(f'{ROTA_IMAGENS}/falante/<falante>/<int:inicio>/<int:fim>')
+def nuvem_falante(falante, inicio, fim):
+    # Só serve nuvens já geradas por gerar_nuvem_falante, sem renderizar na requisição
+    if falante != TODOS_FALANTES and falante not in FALANTES:
+        abort(404)
+    return responder_artefato(chave_nuvem_falante(falante, inicio, fim))
+
+# Modo ao vivo: o estado é incremental, cada consulta só lê as linhas novas
+marcar_fase('dados derivados do snapshot')
+
+acompanhamento = None
+if AO_VIVO:
+    acompanhamento = AcompanhamentoTranscricao(ARQUIVO_TRANSCRICAO, carregar_stopwords())
+    acompanhamento.atualizar()
+
+def formatar_segundos(segundos):
+    if segundos < 0:
+        return ''
+    horas, resto = divmod(segundos, 3600)
+    return f'[{horas:02d}:{resto // 60:02d}:{resto % 60:02d}]' if horas else f'[{resto // 60:02d}:{resto % 60:02d}]'
+
+def secao_ao_vivo():
+    return html.Div([
+        html.Div([html.I(className='bi bi-broadcast', style={'color': '#F76E11', 'marginRight': '0.5em'}), 'Ao Vivo'],
+                 className='carousel-title'),
+        dcc.Interval(id='intervalo-ao-vivo', interval=INTERVALO_AO_VIVO_MS),
+        dcc.Store(id='versao-ao-vivo'),
+        html.Div(id='falantes-ao-vivo', className='main-subtitle'),
+        dbc.Row([
+            dbc.Col([
+                html.Div(id='ultimas-falas-ao-vivo', className='transcricao-box')
+            ], md=6),
+            dbc.Col([
+                dcc.Graph(id='evolucao-ao-vivo', config={'displayModeBar': False}),
+                dcc.Graph(id='palavras-ao-vivo', config={'displayModeBar': False}),
+            ], md=6),
+        ]),
+    ], className='custom-card', style={'marginBottom': '2em'})
+
+marcar_fase('modo ao vivo')
 
 # Carrossel de nuvens de palavras
 carousel_items = [
-    {"key": "1", "src": f"data:image/png;base64,{nuvem1}"},
-    {"key": "2", "src": f"data:image/png;base64,{nuvem2}"},
-    {"key": "3", "src": f"data:image/png;base64,{nuvem3}"},
+    {"key": "1", "src": nuvem1},
+    {"key": "2", "src": nuvem2},
+    {"key": "3", "src": nuvem3},
 ]
 
 app.layout = dbc.Container([
@@ -290,9 +459,10 @@ app.layout = dbc.Container([
             style={'maxWidth': '900px', 'margin': '0 auto', 'background': '#181828', 'borderRadius': '16px', 'boxShadow': '0 0 10px #a259f7aa', 'padding': '1em', 'overflow':'visible'}
         ),
     ], style={'marginBottom': '2em'}),
+    secao_ao_vivo() if AO_VIVO else html.Div(),
     html.Div([
         html.Div('Nuvem Geral', className='carousel-title'),
-        html.Img(src=f'data:image/png;base64,{nuvem_base64}', className='nuvem-img', id='nuvem-geral-img', style={'display': 'block', 'margin': '0 auto', 'maxWidth': '900px'}),
+        html.Img(src=url_nuvem_geral, className='nuvem-img', id='nuvem-geral-img', style={'display': 'block', 'margin': '0 auto', 'maxWidth': '900px'}),
     ], style={'marginBottom': '2em'}),
     dbc.Row([
         dbc.Col([
@@ -300,21 +470,26 @@ app.layout = dbc.Container([
                 html.Div('Transcrição', className='carousel-title', style={'textAlign': 'left'}),
                 html.Div([
                     html.Div([
-                        dcc.Input(id='busca-termo', type='text', placeholder='Buscar...', className='busca-input'),
+                        dcc.Input(id='busca-termo', type='text', placeholder='Buscar...', className='busca-input',
+                                  debounce=ESPERA_BUSCA_S),
                         html.I(className='bi bi-search busca-icon')
                     ], className='busca-box'),
+                    dcc.Dropdown(id='busca-falante', value=TODOS_FALANTES, clearable=False, searchable=False,
+                                 options=[{'label': 'Todos os falantes', 'value': TODOS_FALANTES}] +
+                                         [{'label': f.title(), 'value': f} for f in FALANTES],
+                                 style={'color': '#18191A', 'marginBottom': '1em'}),
+                    dcc.Store(id='busca-config', data={'url': url_indice_cliente, 'minimo': MINIMO_CARACTERES_BUSCA,
+                                                       'limite': LIMITE_RESULTADOS, 'falantes': FALANTES}),
+                    dcc.Store(id='busca-servidor'),
                     html.Div(id='resultado-busca', style={'marginBottom': '1em'}),
-                    html.Div([
-                        html.Div([
-                            html.Span(l.split(']')[0] + ']', style={'color': '#a259f7', 'fontWeight': 'bold', 'marginRight': '0.5em'}),
-                            html.Span(l.split(']')[1].strip(), style={'color': '#F5F6FA'})
-                        ], style={'marginBottom': '0.7em', 'padding': '0.5em 0.7em', 'background': '#222', 'borderRadius': '8px', 'display': 'flex', 'alignItems': 'baseline'})
-                        for l in linhas if ']' in l
-                    ], className='transcricao-box'),
+                    html.Div(id='transcricao-box', className='transcricao-box'),
+                    dbc.Pagination(id='pagina-transcricao', max_value=total_paginas, active_page=1,
+                                   fully_expanded=False, first_last=True, previous_next=True, size='sm',
+                                   style={'marginTop': '0.5em', 'justifyContent': 'center'}),
                     html.A([
                         html.I(className='bi bi-download'),
                         ' Baixar Transcrição'
-                    ], id='download-link', download='transcricao_debate.txt', href='data:text/plain;charset=utf-8,' + transcricao, target='_blank', className='download-btn')
+                    ], id='download-link', download='transcricao_debate.txt', href=ROTA_DOWNLOAD, target='_blank', className='download-btn')
                 ])
             ], className='custom-card', style={'maxWidth': '700px', 'margin': '0 auto'})
         ], md=6),
@@ -327,12 +502,86 @@ app.layout = dbc.Container([
             ], style={'maxWidth': '900px', 'margin': '0 auto'})
         ], md=6)
     ], style={'marginBottom': '2em'}),
+    html.Div([
+        html.Div('Intervalo do Debate', className='carousel-title'),
+        html.Div([
+            dcc.RangeSlider(id='intervalo-tempo', min=0, max=ultimo_minuto, step=1, value=[0, ultimo_minuto],
+                            marks=marcas_minutos, allowCross=False, tooltip={'placement': 'bottom'}),
+            html.Img(id='nuvem-intervalo-img', src=url_nuvem_debate, className='nuvem-img',
+                     style={'display': 'block', 'margin': '1em auto 0 auto'}),
+        ], className='grafico-card'),
+    ], style={'maxWidth': '900px', 'margin': '0 auto', 'marginBottom': '2em'}),
+    html.Div([
+        html.Div('Falantes', className='carousel-title'),
+        dbc.Row([
+            dbc.Col([
+                html.Div([
+                    dcc.Graph(id='tempo-falantes', config={'displayModeBar': False})
+                ], className='grafico-card')
+            ], md=6),
+            dbc.Col([
+                html.Div([
+                    dcc.Dropdown(id='falante-analise', value=FALANTES[-1] if FALANTES else None, clearable=False,
+                                 options=[{'label': f.title(), 'value': f} for f in FALANTES],
+                                 style={'color': '#18191A'}),
+                    html.Div(id='resumo-falante', style={'color': '#B0BEC5', 'marginTop': '0.5em'}),
+                    dcc.Graph(id='palavras-falante', config={'displayModeBar': False}),
+                ], className='grafico-card')
+            ], md=6),
+        ]),
+    ], style={'marginBottom': '2em'}),
+    html.Div([
+        html.Div('Expressões Mais Usadas', className='carousel-title'),
+        html.Div([
+            html.Div([
+                dcc.Dropdown(id='falante-expressoes', value=TODOS_FALANTES, clearable=False, searchable=False,
+                             options=[{'label': 'Todos', 'value': TODOS_FALANTES}] +
+                                     [{'label': f.title(), 'value': f} for f in FALANTES],
+                             style={'flex': 1, 'color': '#18191A'}),
+                dbc.RadioItems(id='tamanho-expressoes', value=2, inline=True,
+                               options=[{'label': '2 palavras', 'value': 2}, {'label': '3 palavras', 'value': 3}],
+                               style={'marginLeft': '1em'}),
+                dbc.RadioItems(id='ordem-expressoes', value='llr', inline=True,
+                               options=[{'label': rotulo, 'value': ordem} for ordem, rotulo in ORDENS.items()],
+                               style={'marginLeft': '1em'}),
+            ], style={'display': 'flex', 'alignItems': 'center', 'flexWrap': 'wrap'}),
+            dash_table.DataTable(
+                id='tabela-expressoes',
+                columns=[{'name': 'Expressão', 'id': 'expressao'}, {'name': 'Frequência', 'id': 'frequencia'},
+                         {'name': 'PMI', 'id': 'pmi'}, {'name': 'Log-verossimilhança', 'id': 'llr'}],
+                style_table={'backgroundColor':'#181828', 'borderRadius':'12px', 'overflow':'hidden', 'marginTop': '1em'},
+                style_header={'backgroundColor':'#2d1847', 'color':'#fff', 'fontWeight':'bold'},
+                style_cell={'backgroundColor':'#181828', 'color':'#f0f0f0', 'fontSize':16, 'textAlign':'center'},
+                style_data_conditional=[
+                    {'if': {'row_index': 'even'}, 'backgroundColor': '#23272F'},
+                ],
+            ),
+        ], className='grafico-card'),
+    ], style={'maxWidth': '900px', 'margin': '0 auto', 'marginBottom': '2em'}),
+    html.Div([
+        html.Div('Nuvem por Falante', className='carousel-title'),
+        html.Div([
+            html.Div([
+                dcc.Dropdown(id='falante-nuvem', value=TODOS_FALANTES, clearable=False,
+                             options=[{'label': 'Todos', 'value': TODOS_FALANTES}] +
+                                     [{'label': f.title(), 'value': f} for f in FALANTES],
+                             style={'flex': 1, 'color': '#18191A'}),
+                dbc.Button('Gerar nuvem', id='gerar-nuvem-falante', color='primary', style={'marginLeft': '0.5em'}),
+                dbc.Button('Cancelar', id='cancelar-nuvem-falante', color='secondary', disabled=True,
+                           style={'marginLeft': '0.5em'}),
+            ], style={'display': 'flex', 'alignItems': 'center'}),
+            dbc.Progress(id='progresso-nuvem-falante', value=0, max=3, striped=True, animated=True,
+                         style={'visibility': 'hidden', 'marginTop': '0.5em'}),
+            html.Div(id='status-nuvem-falante', style={'color': '#B0BEC5', 'marginTop': '0.5em'}),
+            html.Img(id='nuvem-falante-img', className='nuvem-img', style={'display': 'block', 'margin': '1em auto 0 auto'}),
+        ], className='grafico-card'),
+    ], style={'maxWidth': '900px', 'margin': '0 auto', 'marginBottom': '2em'}),
     dbc.Row([
         dbc.Col([
             html.Div([
                 html.Div('Palavras com Maior Frequência', className='carousel-title'),
                 html.Div([
-                    dcc.Graph(figure=fig_palavras, config={'displayModeBar': False})
+                    dcc.Graph(id='grafico-palavras', figure=fig_palavras, config={'displayModeBar': False})
                 ], className='grafico-card', style={'maxWidth':'900px'})
             ], style={'maxWidth': '900px', 'margin': '0 auto'})
         ], md=6),
@@ -342,11 +591,19 @@ app.layout = dbc.Container([
                 html.Div([
                     dash_table.DataTable(
                         id='tabela-palavras',
-                        columns=[{"name": i, "id": i} for i in df_palavras.columns],
-                        data=df_palavras.to_dict('records'),
-                        filter_action='native',
-                        sort_action='native',
-                        page_size=10,
+                        columns=[{"name": 'Palavra', "id": 'Palavra'},
+                                 {"name": 'Frequência', "id": 'Frequência', 'type': 'numeric'}],
+                        data=pagina_ranking(ranking_geral, 0, PALAVRAS_POR_PAGINA)[0],
+                        page_action='custom',
+                        page_current=0,
+                        page_size=PALAVRAS_POR_PAGINA,
+                        page_count=max(1, -(-len(ranking_geral['palavras']) // PALAVRAS_POR_PAGINA)),
+                        filter_action='custom',
+                        filter_query='',
+                        filter_options={'placeholder_text': 'Filtrar...'},
+                        sort_action='custom',
+                        sort_mode='single',
+                        sort_by=[],
                         style_table={'backgroundColor':'#181828', 'borderRadius':'12px', 'overflow':'hidden'},
                         style_header={'backgroundColor':'#2d1847', 'color':'#fff', 'fontWeight':'bold'},
                         style_cell={'backgroundColor':'#181828', 'color':'#f0f0f0', 'fontSize':16, 'textAlign':'center'},
@@ -378,6 +635,22 @@ app.layout = dbc.Container([
                         html.I(className='bi bi-graph-up'),
                         html.Span('Analise a Linha do Tempo — O gráfico temporal mostra quando os participantes mais falaram. Ideal para identificar picos de discussão.')
                     ]),
+                    html.Li([
+                        html.I(className='bi bi-sliders'),
+                        html.Span('Escolha um Intervalo do Debate — Arraste o controle de tempo para ver a nuvem, o gráfico de frequência e o ranking só daquele trecho.')
+                    ]),
+                    html.Li([
+                        html.I(className='bi bi-people'),
+                        html.Span('Compare os Falantes — Veja quanto tempo cada um falou e escolha um falante para ver as palavras que ele mais usou. A busca na transcrição também pode ser filtrada por falante.')
+                    ]),
+                    html.Li([
+                        html.I(className='bi bi-chat-quote'),
+                        html.Span('Descubra as Expressões Mais Usadas — Veja as combinações de duas ou três palavras que mais aparecem juntas, no debate todo ou nas falas de cada participante. Ordene por frequência ou pelas medidas de associação (PMI e log-verossimilhança), que destacam expressões fixas.')
+                    ]),
+                    html.Li([
+                        html.I(className='bi bi-person-lines-fill'),
+                        html.Span('Gere a Nuvem de um Falante — Escolha o mediador ou um dos candidatos e clique em Gerar nuvem. A nuvem usa o intervalo escolhido acima e pode ser cancelada enquanto é gerada.')
+                    ]),
                     html.Li([
                         html.I(className='bi bi-bar-chart'),
                         html.Span('Confira a Frequência das Palavras — Visualize as palavras mais mencionadas por meio do gráfico de barras. Cada barra representa a intensidade de uso.')
@@ -396,18 +669,204 @@ app.layout = dbc.Container([
     ], style={'maxWidth': '900px', 'margin': '0 auto', 'marginBottom': '2em'})
 ], fluid=True, style={'paddingBottom':'40px', 'paddingTop':'20px', 'paddingLeft':'2vw', 'paddingRight':'2vw'})
 
-@app.callback(
+marcar_fase('layout')
+
+# A busca roda no navegador; o servidor só recebe em 'busca-servidor' os
+# termos que o navegador não conseguiu responder
+app.clientside_callback(
+    ClientsideFunction(namespace='busca', function_name='buscar'),
     Output('resultado-busca', 'children'),
-    Input('busca-termo', 'value')
+    Output('busca-servidor', 'data'),
+    Input('busca-termo', 'value'),
+    Input('busca-falante', 'value'),
+    State('busca-config', 'data')
 )
-def atualizar_busca(termo):
+
+app.clientside_callback(
+    ClientsideFunction(namespace='busca', function_name='destacar'),
+    Input('busca-termo', 'value'),
+    Input('transcricao-box', 'children'),
+    State('busca-config', 'data')
+)
+
+@app.callback(
+    Output('resultado-busca', 'children', allow_duplicate=True),
+    Input('busca-servidor', 'data'),
+    State('busca-termo', 'value'),
+    State('busca-falante', 'value'),
+    prevent_initial_call=True
+)
+def atualizar_busca(pedido, termo_atual, falante_atual):
+    termo, falante = pedido['termo'], pedido['falante']
+    if termo != (termo_atual or '').strip() or falante != falante_atual:
+        # O usuário já mudou a busca; a resposta chegaria atrasada
+        return dash.no_update
     if termo:
-        resultados = [l for l in linhas if termo.lower() in l.lower()]
+        indice = obter_indice_busca()
+        total, resultados = busca_transcricao(indice, termo, LINHAS_FALANTE.get(falante))
         if resultados:
-            return html.Pre('\n'.join(resultados), style={'backgroundColor':'#23272F', 'color':'#F5F6FA', 'padding':'10px', 'borderRadius':'8px', 'fontSize':'1em'})
+            palavras = palavras_da_consulta(indice, termo)
+            texto = []
+            for r in resultados:
+                if texto:
+                    texto.append('\n')
+                texto += [f"{r['timestamp']} " if r['timestamp'] else ''] + texto_destacado(r['texto'], palavras)
+            filhos = [html.Pre(texto)]
+            if total > len(resultados):
+                filhos.append(html.P(f'Mostrando os {len(resultados)} trechos mais relevantes de {total} encontrados.', style={'color':'#B0BEC5'}))
+            return filhos
         else:
             return html.P('Nenhum resultado encontrado.', style={'color':'#F76E11'})
     return ''
 
+@app.callback(
+    Output('tempo-falantes', 'figure'),
+    Output('resumo-falante', 'children'),
+    Output('palavras-falante', 'figure'),
+    Input('falante-analise', 'value')
+)
+def atualizar_falante(falante):
+    # Tudo vem do índice por falante montado na inicialização; os gráficos
+    # ficam fora do layout e chegam com a primeira chamada
+    if falante not in LINHAS_FALANTE:
+        return grafico_tempo_falantes([], [], []), '', grafico_palavras(Counter())
+    minutos = TEMPO_FALANTE[falante] / 60
+    palavras = int(FREQUENCIAS_FALANTE[falante].sum())
+    resumo = f'{FALAS_FALANTE[falante]} falas · {minutos:.1f} min de fala · {palavras} palavras relevantes'
+    return figura_tempo_falantes(falante), resumo, figura_palavras_falante(falante)
+
+@app.callback(
+    Output('tabela-expressoes', 'data'),
+    Input('falante-expressoes', 'value'),
+    Input('tamanho-expressoes', 'value'),
+    Input('ordem-expressoes', 'value')
+)
+def atualizar_expressoes(falante, n, ordem):
+    if (falante != TODOS_FALANTES and falante not in FALANTES) or n not in (2, 3) or ordem not in ORDENS:
+        return []
+    return expressoes_principais(estatisticas_expressoes(falante, n), snapshot['vocabulario'], ordem,
+                                 EXPRESSOES_POR_TABELA)
+
+@app.callback(
+    Output('transcricao-box', 'children'),
+    Input('pagina-transcricao', 'active_page')
+)
+def atualizar_pagina_transcricao(pagina):
+    # Devolve só as falas da página pedida
+    inicio = ((pagina or 1) - 1) * LINHAS_POR_PAGINA
+    return [div_fala(*separar_fala(linhas[i])) for i in linhas_com_timestamp[inicio:inicio + LINHAS_POR_PAGINA]]
+
+@app.callback(
+    Output('grafico-palavras', 'figure'),
+    Output('tabela-palavras', 'page_current'),
+    Input('intervalo-tempo', 'value'),
+    prevent_initial_call=True
+)
+def atualizar_intervalo(intervalo):
+    inicio, fim = intervalo
+    palavras, freq = ranking_intervalo(inicio, fim, 20)
+    fig = grafico_palavras(Counter(dict(zip(palavras.tolist(), freq.tolist()))))
+    # A tabela volta para a primeira página do novo intervalo
+    return fig, 0
+
+@app.callback(
+    Output('nuvem-intervalo-img', 'src'),
+    Input('intervalo-tempo', 'value'),
+    background=True,
+    interval=500,
+    prevent_initial_call=True
+)
+def gerar_nuvem_intervalo(intervalo):
+    # Renderiza num processo separado, só quando o intervalo muda: o debate
+    # inteiro já vem pronto no snapshot. Como em gerar_nuvem_falante, a nuvem
+    # é lida do cache de artefatos ou renderizada de novo se foi descartada
+    inicio, fim = intervalo
+    if inicio <= 0 and fim >= ultimo_minuto:
+        return url_nuvem_debate
+    if png_nuvem_intervalo(inicio, fim) is None:
+        return ''
+    versao = chave_nuvem_intervalo(inicio, fim)[:12]
+    return f'{ROTA_IMAGENS}/intervalo/{inicio}/{fim}?v={versao}'
+
+@app.callback(
+    Output('tabela-palavras', 'data'),
+    Output('tabela-palavras', 'page_count'),
+    Input('tabela-palavras', 'page_current'),
+    Input('tabela-palavras', 'page_size'),
+    Input('tabela-palavras', 'sort_by'),
+    Input('tabela-palavras', 'filter_query'),
+    Input('intervalo-tempo', 'value'),
+    prevent_initial_call=True
+)
+def atualizar_tabela_palavras(pagina, tamanho, ordenacao, filtro, intervalo):
+    # Paginação, ordenação e filtro no servidor: só a página pedida é enviada
+    ranking = ranking_tabela(*intervalo)
+    linhas_pagina, total = pagina_ranking(ranking, pagina or 0, tamanho, ordenacao, filtro)
+    return linhas_pagina, max(1, -(-total // tamanho))
+
+@app.callback(
+    Output('nuvem-falante-img', 'src'),
+    Output('status-nuvem-falante', 'children'),
+    Input('gerar-nuvem-falante', 'n_clicks'),
+    State('falante-nuvem', 'value'),
+    State('intervalo-tempo', 'value'),
+    background=True,
+    interval=500,
+    running=[
+        (Output('gerar-nuvem-falante', 'disabled'), True, False),
+        (Output('cancelar-nuvem-falante', 'disabled'), False, True),
+        (Output('progresso-nuvem-falante', 'style'), {'visibility': 'visible', 'marginTop': '0.5em'},
+         {'visibility': 'hidden', 'marginTop': '0.5em'}),
+    ],
+    cancel=[Input('cancelar-nuvem-falante', 'n_clicks')],
+    progress=[Output('progresso-nuvem-falante', 'value'), Output('progresso-nuvem-falante', 'label')],
+    prevent_initial_call=True
+)
+def gerar_nuvem_falante(set_progress, _, falante, intervalo):
+    # Roda num processo separado. png_nuvem_falante lê a nuvem do cache de
+    # artefatos (ou a renderiza de novo, se ela foi descartada), então a URL
+    # devolvida sempre aponta para uma imagem que a rota consegue servir
+    inicio, fim = intervalo
+    nome = 'todos os falantes' if falante == TODOS_FALANTES else falante.title()
+    set_progress((1, 'Contando palavras...'))
+    palavras, _freq = ranking_falante(falante, inicio, fim, 1)
+    if not len(palavras):
+        return '', f'Nenhuma palavra de {nome} entre {inicio}min e {fim}min.'
+    set_progress((2, 'Renderizando nuvem...'))
+    png_nuvem_falante(falante, inicio, fim)
+    set_progress((3, 'Pronto'))
+    versao = chave_nuvem_falante(falante, inicio, fim)[:12]
+    return (f'{ROTA_IMAGENS}/falante/{falante}/{inicio}/{fim}?v={versao}',
+            f'Nuvem de {nome} entre {inicio}min e {fim}min.')
+
+if AO_VIVO:
+    @app.callback(
+        Output('versao-ao-vivo', 'data'),
+        Output('falantes-ao-vivo', 'children'),
+        Output('ultimas-falas-ao-vivo', 'children'),
+        Output('evolucao-ao-vivo', 'figure'),
+        Output('palavras-ao-vivo', 'figure'),
+        Input('intervalo-ao-vivo', 'n_intervals'),
+        State('versao-ao-vivo', 'data')
+    )
+    def atualizar_ao_vivo(_, versao_cliente):
+        # Só lê as linhas acrescentadas; nada é enviado se o cliente já tem a versão atual
+        acompanhamento.atualizar()
+        with acompanhamento.trava:
+            if versao_cliente == acompanhamento.versao:
+                return (dash.no_update,) * 5
+            falas = acompanhamento.falas
+            resumo = ' · '.join(f'{candidato.title()}: {falas[candidato]} falas' for candidato in acompanhamento.padroes)
+            falante = f'Falando agora: {acompanhamento.candidato_atual.title()} — {resumo}'
+            ultimas = [div_fala(formatar_segundos(segundos), f'{candidato.title()}: {texto}')
+                       for segundos, candidato, texto in reversed(acompanhamento.ultimas)]
+            minutos = sorted(acompanhamento.falas_por_minuto)
+            evolucao = grafico_falas_por_minuto(minutos, [acompanhamento.falas_por_minuto[m] for m in minutos])
+            palavras = grafico_palavras(acompanhamento.contagem)
+            return acompanhamento.versao, falante, ultimas, evolucao, palavras
+
+marcar_fase('callbacks')
+relatorio_inicio()
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,171 @@
+# Identificação automática de quem está falando na transcrição
+# Usada por gerar_nuvem_por_usuario.py e pela análise da dashboard
+
+import json
+import re
+from collections import defaultdict
+
+from analise_transcricao import REGEX_TIMESTAMP
+
+# Padrões para identificar falantes (texto literal, comparado em minúsculas).
+# A ordem das chaves é a ordem de prioridade usada na atribuição; o primeiro
+# falante é o mediador, que fala no início e quando nenhum candidato é citado.
+PADROES_FALANTES = {
+    'mediador': [
+        r'debate eleitoral',
+        r'candidatos ao cargo de reitor',
+        r'sejam todos muito bem-vindos',
+        r'regras aqui',
+        r'avisos importantes',
+        r'primeiro bloco',
+        r'segundo bloco',
+        r'terceiro momento',
+        r'convidamos',
+        r'professor',
+        r'candidata',
+        r'candidato',
+        r'ok',
+        r'partir de agora',
+        r'minutos para',
+        r'passaremos então',
+        r'próximo momento',
+        r'encerra-se',
+        r'considerações finais',
+        r'vamos fazer',
+        r'pessoal',
+        r'aviso importante',
+        r'intervalo',
+        r'retomamos',
+        r'sequência'
+    ],
+    'adriana': [
+        r'sou adriana',
+        r'candidata reitora',
+        r'adriana peontkovic',
+        r'adriana peondi-kovics',
+        r'professora adriana',
+        r'candidata adriana',
+        r'candidata professora adriana',
+        r'professora candidata adriana'
+    ],
+    'ludovico': [
+        r'professor do vico',
+        r'ludovico hortelébifaria',
+        r'professor ludovico',
+        r'candidato ludovico',
+        r'professor ludovin',
+        r'candidato ludovin',
+        r'professor ludo vico',
+        r'candidato professor ludo vico'
+    ]
+}
+
+def _regex_trie(textos):
+    """
+    Monta uma regex a partir de uma trie dos textos, de forma que em cada
+    posição ela case sempre o texto mais longo possível
+    """
+    trie = {}
+    for texto in textos:
+        no = trie
+        for c in texto:
+            no = no.setdefault(c, {})
+        no[''] = {}
+
+    def montar(no):
+        fim = '' in no
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ''
+        grupo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        return f'(?:{grupo})?' if fim else grupo
+
+    return montar(trie)
+
+def compilar_padroes(padroes):
+    """
+    Compila todos os padrões num único matcher, varrido uma vez por linha.
+    Retorna a regex e um dicionário padrão -> falantes indicados por ele
+    """
+    falantes_por_padrao = defaultdict(set)
+    for candidato, padrao_list in padroes.items():
+        for padrao in padrao_list:
+            falantes_por_padrao[padrao].add(candidato)
+    # A regex devolve o padrão mais longo em cada posição; os padrões mais
+    # curtos que começam no mesmo ponto são prefixos dele e também contam
+    indicados = {
+        padrao: set().union(*(f for p, f in falantes_por_padrao.items() if padrao.startswith(p)))
+        for padrao in falantes_por_padrao
+    }
+    regex = re.compile('(?=(' + _regex_trie(falantes_por_padrao) + '))')
+    return regex, indicados
+
+MATCHER_FALANTES = compilar_padroes(PADROES_FALANTES)
+
+def carregar_padroes(caminho):
+    """
+    Lê os padrões de falantes de um arquivo JSON no mesmo formato de
+    PADROES_FALANTES: {"falante": ["padrão", ...], ...}, mediador primeiro
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        padroes = json.load(f)
+    if not padroes or not all(isinstance(p, list) for p in padroes.values()):
+        raise ValueError(f'{caminho}: esperado um objeto falante -> lista de padrões')
+    # Um padrão vazio casaria com toda linha, e sem nenhum padrão a regex fica vazia
+    for falante, lista in padroes.items():
+        if not lista:
+            raise ValueError(f'{caminho}: o falante {falante!r} não tem nenhum padrão')
+        if not all(isinstance(p, str) and p.strip() for p in lista):
+            raise ValueError(f'{caminho}: o falante {falante!r} tem um padrão vazio ou que não é texto')
+    return {falante: [p.lower() for p in lista] for falante, lista in padroes.items()}
+
+def falante_da_linha(linha_limpa, candidato_atual, padroes=PADROES_FALANTES, matcher=MATCHER_FALANTES):
+    """
+    Falante de uma linha (já sem timestamp e não vazia), dado quem estava
+    falando antes dela
+    """
+    regex, indicados = matcher
+    mediador = next(iter(padroes))
+    
+    # Uma única varredura da linha coleta todos os falantes citados
+    encontrados = set()
+    for m in regex.finditer(linha_limpa.lower()):
+        encontrados |= indicados[m.group(1)]
+    
+    # Identifica quem está falando baseado nos padrões
+    for candidato in padroes:
+        if candidato in encontrados:
+            candidato_atual = candidato
+        if candidato_atual != mediador:
+            break
+    return candidato_atual
+
+def rotular_falantes(linhas, padroes=PADROES_FALANTES, matcher=MATCHER_FALANTES, candidato_atual=None):
+    """
+    Percorre as linhas devolvendo (linha sem timestamp, falante) para cada uma;
+    linhas vazias saem com falante None e não mudam quem está falando.
+    candidato_atual permite continuar de onde uma leitura anterior parou
+    """
+    if candidato_atual is None:
+        candidato_atual = next(iter(padroes))  # Começa com o mediador
+    for linha in linhas:
+        linha_limpa = REGEX_TIMESTAMP.sub('', linha).strip()
+        if not linha_limpa:
+            yield linha_limpa, None
+            continue
+        
+        candidato_atual = falante_da_linha(linha_limpa, candidato_atual, padroes, matcher)
+        yield linha_limpa, candidato_atual
+
+def identificar_falantes(linhas, padroes=PADROES_FALANTES, matcher=MATCHER_FALANTES):
+    """
+    Identifica automaticamente quem está falando baseado no contexto
+    """
+    falas_por_candidato = {candidato: [] for candidato in padroes}
+    
+    for linha_limpa, candidato in rotular_falantes(linhas, padroes, matcher):
+        # Adiciona a fala ao candidato identificado
+        if candidato is not None:
+            falas_por_candidato[candidato].append(linha_limpa)
+    
+    return falas_por_candidato
@@ -1,178 +1,170 @@
 # Script para gerar nuvem de palavras por usuário/candidato
 # Identifica automaticamente quem está falando baseado no contexto
-# Requer: wordcloud, matplotlib, nltk
+# Requer: numpy, wordcloud, matplotlib (os dois últimos importados só na hora de renderizar)
 
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import nltk
+import argparse
+import io
 import os
-import re
-from collections import defaultdict
-
-# Baixa stopwords do NLTK se necessário
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
-from nltk.corpus import stopwords
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from cache_artefatos import artefato, chave_artefato, hash_conteudo
+import numpy as np
+from analise_transcricao import (REGEX_TIMESTAMP, analisar_transcricao, carregar_stopwords, contagem_ids,
+                                 frequencias_por_falante)
+from falantes import PADROES_FALANTES, rotular_falantes
+from processamento_streaming import contar_streaming
 
 ARQUIVO_TRANSCRICAO = 'data/transcricao.txt'
 PASTA_IMAGENS = 'imgs'
 os.makedirs(PASTA_IMAGENS, exist_ok=True)
 
 # Stopwords em português
-stopwords_pt = set(stopwords.words('portuguese'))
+stopwords_pt = set(carregar_stopwords())
 stopwords_pt.update(['senhor', 'senhora', 'candidato', 'candidata', 'professor', 'professora',
                     'ifis', 'debate', 'pergunta', 'resposta', 'minuto', 'minutos', 'bloco',
                     'agora', 'momento', 'gente', 'aqui', 'bom', 'ok', 'então', 'assim', 'também'])
 
-def identificar_falantes(linhas):
-    """
-    Identifica automaticamente quem está falando baseado no contexto
-    """
-    falas_por_candidato = {
-        'mediador': [],
-        'adriana': [],
-        'ludovico': []
-    }
-    
-    # Padrões para identificar falantes
-    padroes = {
-        'mediador': [
-            r'debate eleitoral',
-            r'candidatos ao cargo de reitor',
-            r'sejam todos muito bem-vindos',
-            r'regras aqui',
-            r'avisos importantes',
-            r'primeiro bloco',
-            r'segundo bloco',
-            r'terceiro momento',
-            r'convidamos',
-            r'professor',
-            r'candidata',
-            r'candidato',
-            r'ok',
-            r'partir de agora',
-            r'minutos para',
-            r'passaremos então',
-            r'próximo momento',
-            r'encerra-se',
-            r'considerações finais',
-            r'vamos fazer',
-            r'pessoal',
-            r'aviso importante',
-            r'intervalo',
-            r'retomamos',
-            r'sequência'
-        ],
-        'adriana': [
-            r'sou adriana',
-            r'candidata reitora',
-            r'adriana peontkovic',
-            r'adriana peondi-kovics',
-            r'professora adriana',
-            r'candidata adriana',
-            r'candidata professora adriana',
-            r'professora candidata adriana'
-        ],
-        'ludovico': [
-            r'professor do vico',
-            r'ludovico hortelébifaria',
-            r'professor ludovico',
-            r'candidato ludovico',
-            r'professor ludovin',
-            r'candidato ludovin',
-            r'professor ludo vico',
-            r'candidato professor ludo vico'
-        ]
-    }
-    
-    candidato_atual = 'mediador'  # Começa com o mediador
-    
-    for linha in linhas:
-        linha_limpa = re.sub(r'\[\d{2}:\d{2}\]', '', linha).strip()
-        if not linha_limpa:
-            continue
-            
-        # Identifica quem está falando baseado nos padrões
-        for candidato, padrao_list in padroes.items():
-            for padrao in padrao_list:
-                if re.search(padrao, linha_limpa.lower()):
-                    candidato_atual = candidato
-                    break
-            if candidato_atual != 'mediador':
-                break
-        
-        # Adiciona a fala ao candidato identificado
-        falas_por_candidato[candidato_atual].append(linha_limpa)
-    
-    return falas_por_candidato
+# Parâmetros de renderização (também fazem parte da chave do cache)
+PARAMETROS_NUVEM = dict(
+    width=800,
+    height=400,
+    background_color='white',
+    collocations=False,
+    max_words=100,
+    colormap='viridis'
+)
+DPI_NUVEM = 300
 
-def gerar_nuvem_candidato(texto, nome_candidato, stopwords_pt):
+def renderizar_nuvem(texto_limpo, nome_candidato, stopwords_pt):
     """
-    Gera nuvem de palavras para um candidato específico
+    Renderiza a nuvem com matplotlib e devolve os bytes do PNG.
+    texto_limpo também pode ser um dicionário palavra -> frequência
     """
-    # Remove timestamps
-    texto_limpo = re.sub(r'\[\d{2}:\d{2}\]', '', texto)
+    # wordcloud e matplotlib só são carregados quando há algo a renderizar
+    # (num cache quente, nem chegam a ser importados)
+    from wordcloud import WordCloud
+    import matplotlib
+    matplotlib.use('Agg')  # Renderização sem interface gráfica (também nos processos do pool)
+    import matplotlib.pyplot as plt
     
     # Gera a nuvem de palavras
-    wordcloud = WordCloud(
-        width=800,
-        height=400,
-        background_color='white',
-        stopwords=stopwords_pt,
-        collocations=False,
-        max_words=100,
-        colormap='viridis'
-    ).generate(texto_limpo)
+    wordcloud = WordCloud(stopwords=stopwords_pt, **PARAMETROS_NUVEM)
+    if isinstance(texto_limpo, dict):
+        wordcloud.generate_from_frequencies(texto_limpo)
+    else:
+        wordcloud.generate(texto_limpo)
     
-    # Plota e salva a imagem
+    # Plota a imagem
     plt.figure(figsize=(12, 6))
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
     plt.title(f'Nuvem de Palavras - {nome_candidato.title()}', fontsize=16, pad=20)
     plt.tight_layout()
     
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format='png', dpi=DPI_NUVEM, bbox_inches='tight')
+    plt.close()
+    return buffer.getvalue()
+
+def gerar_nuvem_candidato(texto, nome_candidato, stopwords_pt):
+    """
+    Gera nuvem de palavras para um candidato específico.
+    texto pode ser o texto das falas ou um dicionário palavra -> frequência
+    """
+    if isinstance(texto, dict):
+        texto_limpo = texto
+        hash_entrada = hash_conteudo(*(f'{p}\t{n}' for p, n in sorted(texto.items())))
+    else:
+        # Remove timestamps
+        texto_limpo = REGEX_TIMESTAMP.sub('', texto)
+        hash_entrada = hash_conteudo(texto_limpo)
+    
+    # Só renderiza se o texto ou os parâmetros mudaram desde a última execução
+    parametros = {**PARAMETROS_NUVEM, 'dpi': DPI_NUVEM, 'nome': nome_candidato,
+                  'stopwords': hash_conteudo(*sorted(stopwords_pt))}
+    chave = chave_artefato(hash_entrada, 'nuvem_candidato', parametros)
+    png = artefato(chave, lambda: renderizar_nuvem(texto_limpo, nome_candidato, stopwords_pt))
+    
     # Salva a imagem
     nome_arquivo = f'nuvem_{nome_candidato.lower()}.png'
     caminho_arquivo = os.path.join(PASTA_IMAGENS, nome_arquivo)
-    plt.savefig(caminho_arquivo, dpi=300, bbox_inches='tight')
-    plt.close()
+    with open(caminho_arquivo, 'wb') as f:
+        f.write(png)
     
     return caminho_arquivo
 
+def renderizar_nuvens(tarefas, jobs=1):
+    """
+    Renderiza as nuvens (texto, nome) em série ou num pool de processos.
+    Devolve os caminhos na mesma ordem das tarefas
+    """
+    textos = [texto for texto, _ in tarefas]
+    nomes = [nome for _, nome in tarefas]
+    if jobs <= 1 or len(tarefas) <= 1:
+        return list(map(gerar_nuvem_candidato, textos, nomes, repeat(stopwords_pt)))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tarefas))) as pool:
+        return list(pool.map(gerar_nuvem_candidato, textos, nomes, repeat(stopwords_pt)))
+
 def main():
-    # Lê o arquivo de transcrição
-    with open(ARQUIVO_TRANSCRICAO, 'r', encoding='utf-8') as f:
-        linhas = f.readlines()
+    parser = argparse.ArgumentParser(description='Gera nuvens de palavras por candidato')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='número de processos para renderizar as nuvens em paralelo (padrão: 1)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='processa a transcrição linha a linha guardando só contagens (memória constante)')
+    args = parser.parse_args()
     
-    # Identifica os falantes
-    print("Identificando falantes...")
-    falas_por_candidato = identificar_falantes(linhas)
+    if args.streaming:
+        # Modo streaming: o texto nunca fica inteiro em memória; as nuvens
+        # são geradas a partir das contagens de palavras de cada falante
+        print("Identificando falantes (streaming)...")
+        resultado = contar_streaming(ARQUIVO_TRANSCRICAO, stopwords_pt)
+        for candidato in PADROES_FALANTES:
+            print(f"{candidato.title()}: {resultado['falas'][candidato]} falas")
+        tarefas = [(contagem, candidato) for candidato, contagem in resultado['contagem_falantes'].items()
+                   if resultado['falas'][candidato]]
+        tarefas.append((resultado['contagem'], 'geral'))
+    else:
+        tarefas = tarefas_texto()
     
-    # Mostra estatísticas
-    for candidato, falas in falas_por_candidato.items():
-        print(f"{candidato.title()}: {len(falas)} falas")
-    
-    # Gera nuvens para cada candidato
-    arquivos_gerados = []
-    for candidato, falas in falas_por_candidato.items():
-        if falas:  # Só gera se houver falas
-            texto_candidato = ' '.join(falas)
-            arquivo = gerar_nuvem_candidato(texto_candidato, candidato, stopwords_pt)
-            arquivos_gerados.append(arquivo)
+    # As nuvens são independentes; com --jobs N são renderizadas em paralelo
+    arquivos_gerados = renderizar_nuvens(tarefas, args.jobs)
+    for (_, candidato), arquivo in zip(tarefas, arquivos_gerados):
+        if candidato == 'geral':
+            print(f"Nuvem geral gerada: {arquivo}")
+        else:
             print(f"Nuvem gerada para {candidato.title()}: {arquivo}")
     
-    # Gera também uma nuvem geral para comparação
-    texto_geral = ' '.join(linhas)
-    arquivo_geral = gerar_nuvem_candidato(texto_geral, 'geral', stopwords_pt)
-    arquivos_gerados.append(arquivo_geral)
-    print(f"Nuvem geral gerada: {arquivo_geral}")
-    
     print(f"\n✅ Total de {len(arquivos_gerados)} nuvens geradas com sucesso!")
     print("Arquivos gerados:")
     for arquivo in arquivos_gerados:
         print(f"  - {arquivo}")
 
+def tarefas_texto():
+    # Lê o arquivo de transcrição
+    with open(ARQUIVO_TRANSCRICAO, 'r', encoding='utf-8') as f:
+        linhas = f.readlines()
+    
+    # Identifica os falantes. Em vez de guardar as falas de cada candidato,
+    # cada palavra vira um id e as contagens por falante saem de um único
+    # bincount sobre os ids
+    print("Identificando falantes...")
+    analise = analisar_transcricao(linhas, stopwords_pt)
+    codigos = {candidato: i for i, candidato in enumerate(PADROES_FALANTES)}
+    falantes = np.fromiter((-1 if c is None else codigos[c] for _, c in rotular_falantes(linhas)),
+                           dtype=np.int8, count=len(linhas))
+    falas = np.bincount(falantes[falantes >= 0], minlength=len(codigos))
+    frequencias = frequencias_por_falante(analise['tokens'], analise['offsets'], falantes,
+                                          len(codigos), len(analise['vocabulario']))
+    
+    # Mostra estatísticas
+    for candidato, i in codigos.items():
+        print(f"{candidato.title()}: {falas[i]} falas")
+    
+    # Nuvens para cada candidato (só se houver falas) e uma geral para comparação
+    tarefas = [(contagem_ids(analise['vocabulario'], frequencias[i]), candidato)
+               for candidato, i in codigos.items() if falas[i]]
+    tarefas.append((analise['contagem'], 'geral'))
+    return tarefas
+
 if __name__ == '__main__':
     main() 
@@ -0,0 +1,107 @@
+# Gráficos e tabelas da análise do debate
+# Usados pela dashboard e pelo snapshot da análise (snapshot_analise.py)
+# Requer: plotly, pandas, numpy
+
+import plotly.graph_objects as go
+import numpy as np
+
+def grafico_palavras(contagem):
+    mais_comuns = contagem.most_common(20)
+    if mais_comuns:
+        palavras_, freq_ = zip(*mais_comuns)
+        fig = go.Figure(go.Bar(
+            x=freq_,
+            y=palavras_,
+            orientation='h',
+            marker=dict(color='#4F8DFD'),
+            hoverinfo='x+y',
+        ))
+        fig.update_layout(
+            height=400,
+            plot_bgcolor='#23272F',
+            paper_bgcolor='#18191A',
+            font=dict(color='#F5F6FA', size=16),
+            margin=dict(l=80, r=20, t=40, b=40),
+            xaxis=dict(title='Frequência', color='#F5F6FA', showgrid=False),
+            yaxis=dict(title='', color='#F5F6FA', showgrid=False, autorange='reversed'),
+            showlegend=False
+        )
+        return fig
+    else:
+        return go.Figure()
+
+def grafico_tempo_falantes(nomes, segundos, falas, destaque=None):
+    # Tempo de fala (em minutos) e número de falas de cada falante;
+    # o falante em `destaque` aparece em outra cor
+    if not len(nomes):
+        return go.Figure()
+    fig = go.Figure(go.Bar(
+        x=[s / 60 for s in segundos],
+        y=nomes,
+        orientation='h',
+        marker=dict(color=['#F76E11' if nome == destaque else '#A259F7' for nome in nomes]),
+        customdata=list(falas),
+        hovertemplate='%{y}: %{x:.1f} min em %{customdata} falas<extra></extra>',
+    ))
+    fig.update_layout(
+        height=300,
+        plot_bgcolor='#23272F',
+        paper_bgcolor='#18191A',
+        font=dict(color='#F5F6FA', size=16),
+        margin=dict(l=100, r=20, t=40, b=40),
+        xaxis=dict(title='Minutos de fala', color='#F5F6FA', showgrid=False),
+        yaxis=dict(title='', color='#F5F6FA', showgrid=False, autorange='reversed'),
+        showlegend=False
+    )
+    return fig
+
+def dividir_blocos(linhas):
+    n = len(linhas)
+    bloco1 = linhas[:n//3]
+    bloco2 = linhas[n//3:2*n//3]
+    bloco3 = linhas[2*n//3:]
+    return bloco1, bloco2, bloco3
+
+def grafico_evolucao(segundos):
+    # segundos: array com os segundos de cada linha (-1 = sem timestamp)
+    segundos = np.asarray(segundos)
+    minutos, falas = np.unique(segundos[segundos >= 0] // 60, return_counts=True)
+    return grafico_falas_por_minuto(minutos, falas)
+
+def grafico_falas_por_minuto(minutos, falas):
+    # minutos e o número de falas em cada um, em ordem crescente de minuto
+    if not len(minutos):
+        return go.Figure()
+    fig = go.Figure(go.Scatter(
+        x=minutos,
+        y=falas,
+        mode='lines+markers',
+        line=dict(color='#A259F7', width=3),
+        marker=dict(size=8, color='#F76E11')
+    ))
+    fig.update_layout(
+        title='Evolução Temporal: Falas por Minuto',
+        xaxis_title='Minuto',
+        yaxis_title='Nº de Falas',
+        plot_bgcolor='#23272F',
+        paper_bgcolor='#18191A',
+        font=dict(color='#F5F6FA'),
+        margin=dict(l=40, r=20, t=40, b=40)
+    )
+    return fig
+
+def duracao_media(segundos):
+    segundos = np.asarray(segundos)
+    tempos = segundos[segundos >= 0]
+    if len(tempos) < 2:
+        return 0
+    diffs = np.diff(tempos)
+    return np.mean(diffs)
+
+def tabela_palavras(contagem):
+    import pandas as pd
+    df = pd.DataFrame(contagem.items(), columns=['Palavra', 'Frequência']).sort_values('Frequência', ascending=False)
+    return df
+
+PARAMETROS_NUVEM_BLOCO = dict(width=1200, height=600, background_color='#18191A', colormap='plasma',
+                              max_words=150, min_font_size=10, prefer_horizontal=0.95, relative_scaling=0.5)
@@ -0,0 +1,116 @@
+# Índice invertido para a busca na transcrição
+# Construído uma vez na inicialização; cada consulta toca só as linhas
+# que contêm os termos, em vez de varrer a transcrição inteira.
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from analise_transcricao import PADRAO_TIMESTAMP, REGEX_PALAVRA
+
+REGEX_TIMESTAMP_INICIAL = re.compile(r'^\s*(' + PADRAO_TIMESTAMP + ')')
+LIMITE_RESULTADOS = 50
+
+def construir_indice(linhas):
+    """
+    Indexa as palavras (em minúsculas) de cada linha.
+    Retorna um dicionário com:
+      postagens   - palavra -> {id da linha: ocorrências}
+      vocabulario - palavras ordenadas, para buscas por prefixo
+      timestamps  - timestamp '[MM:SS]' ou '[HH:MM:SS]' de cada linha ('' se não houver)
+      linhas      - as linhas originais
+    """
+    postagens = defaultdict(dict)
+    timestamps = []
+    for i, linha in enumerate(linhas):
+        m = REGEX_TIMESTAMP_INICIAL.match(linha)
+        timestamps.append(m.group(1) if m else '')
+        texto = linha[m.end():] if m else linha
+        for palavra, n in Counter(REGEX_PALAVRA.findall(texto.lower())).items():
+            postagens[palavra][i] = n
+    return {
+        'postagens': dict(postagens),
+        'vocabulario': sorted(postagens),
+        'timestamps': timestamps,
+        'linhas': linhas,
+    }
+
+def _palavras_do_termo(indice, termo):
+    """
+    Palavras do vocabulário que atendem a um termo, com o peso de cada uma:
+    palavra exata (1.0), prefixo (0.5) ou, se nada disso existir,
+    trecho dentro da palavra (0.25)
+    """
+    postagens = indice['postagens']
+    vocabulario = indice['vocabulario']
+    encontradas = {}
+    if termo in postagens:
+        encontradas[termo] = 1.0
+    i = bisect_left(vocabulario, termo)
+    while i < len(vocabulario) and vocabulario[i].startswith(termo):
+        encontradas.setdefault(vocabulario[i], 0.5)
+        i += 1
+    if not encontradas:
+        encontradas = {p: 0.25 for p in vocabulario if termo in p}
+    return encontradas
+
+def palavras_da_consulta(indice, consulta):
+    """
+    Palavras do vocabulário atendidas por algum termo da consulta (para destacar)
+    """
+    palavras = set()
+    for termo in set(REGEX_PALAVRA.findall(consulta.lower())):
+        palavras.update(_palavras_do_termo(indice, termo))
+    return palavras
+
+def indice_cliente(indice, falantes=None):
+    """
+    Versão compacta do índice para a busca no navegador (assets/busca.js):
+    só timestamp e texto de cada linha, e o código do falante de cada uma se
+    `falantes` for passado; as postagens são remontadas lá
+    """
+    dados = {
+        'timestamps': indice['timestamps'],
+        'textos': [REGEX_TIMESTAMP_INICIAL.sub('', linha).strip() for linha in indice['linhas']],
+    }
+    if falantes is not None:
+        dados['falantes'] = [int(c) for c in falantes]
+    return dados
+
+def buscar(indice, consulta, limite=LIMITE_RESULTADOS, mascara=None):
+    """
+    Busca as linhas que contêm todos os termos da consulta (E lógico).
+    Com `mascara` (um booleano por linha), só as linhas marcadas entram.
+    Retorna (total de linhas encontradas, resultados), com no máximo `limite`
+    resultados ordenados por relevância; cada um é um dicionário com
+    linha, timestamp, texto e pontuação
+    """
+    termos = REGEX_PALAVRA.findall(consulta.lower())
+    if not termos:
+        return 0, []
+    n_linhas = max(len(indice['linhas']), 1)
+    pontuacao = None
+    for termo in dict.fromkeys(termos):
+        pontos_termo = Counter()
+        for palavra, peso in _palavras_do_termo(indice, termo).items():
+            linhas_palavra = indice['postagens'][palavra]
+            idf = math.log(1 + n_linhas / len(linhas_palavra))
+            for i, n in linhas_palavra.items():
+                if mascara is None or mascara[i]:
+                    pontos_termo[i] += peso * n * idf
+        if pontuacao is None:
+            pontuacao = pontos_termo
+        else:
+            pontuacao = Counter({i: p + pontos_termo[i] for i, p in pontuacao.items() if i in pontos_termo})
+        if not pontuacao:
+            return 0, []
+    melhores = heapq.nsmallest(limite, pontuacao.items(), key=lambda item: (-item[1], item[0]))
+    resultados = [{
+        'linha': i,
+        'timestamp': indice['timestamps'][i],
+        'texto': REGEX_TIMESTAMP_INICIAL.sub('', indice['linhas'][i]).strip(),
+        'pontuacao': p,
+    } for i, p in melhores]
+    return len(pontuacao), resultados
@@ -0,0 +1,242 @@
+# Métricas do servidor da dashboard, no formato texto do Prometheus
+# Cada callback do Dash (e cada rota do Flask) ganha histogramas de latência
+# e de tamanho da resposta e um contador de erros, expostos em /metrics.
+# Com METRICAS_AMOSTRA_PERFIL > 0, uma fração das requisições é perfilada
+# com cProfile e os perfis (.prof) vão para METRICAS_PASTA_PERFIS.
+# Com vários processos (gunicorn), METRICAS_PASTA_PROCESSOS aponta uma pasta
+# onde cada worker grava as suas contagens; /metrics soma todas, então o
+# resultado não depende de qual worker atendeu a coleta.
+
+import atexit
+import cProfile
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, g, request
+
+ROTA_METRICAS = '/metrics'
+ROTA_CALLBACKS = '/_dash-update-component'
+
+# Limites (le) dos histogramas
+FAIXAS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FAIXAS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Amostragem de perfis: fração das requisições, duração mínima para guardar o perfil e limite de arquivos
+AMOSTRA_PERFIL = float(os.environ.get('METRICAS_AMOSTRA_PERFIL', '0'))
+PERFIL_MINIMO_S = float(os.environ.get('METRICAS_PERFIL_MINIMO_MS', '0')) / 1000
+PASTA_PERFIS = os.environ.get('METRICAS_PASTA_PERFIS', os.path.join('.cache', 'perfis'))
+LIMITE_PERFIS = 200
+
+# Contagens compartilhadas entre processos: pasta e intervalo de gravação de cada worker
+PASTA_PROCESSOS = os.environ.get('METRICAS_PASTA_PROCESSOS')
+INTERVALO_GRAVACAO_S = 1.0
+
+class Histograma:
+    def __init__(self, faixas):
+        self.faixas = faixas
+        self.contagens = [0] * (len(faixas) + 1)  # a última é +Inf
+        self.soma = 0.0
+
+    def observar(self, valor):
+        # Primeira faixa com valor <= le (ou +Inf)
+        self.contagens[bisect_left(self.faixas, valor)] += 1
+        self.soma += valor
+
+_trava = threading.Lock()
+LATENCIAS = defaultdict(lambda: Histograma(FAIXAS_LATENCIA))  # (tipo, alvo) -> histograma
+TAMANHOS = defaultdict(lambda: Histograma(FAIXAS_BYTES))
+ERROS = defaultdict(int)
+
+# Arquivo deste processo na pasta compartilhada (definido depois do fork);
+# a trava própria impede que uma gravação mais antiga substitua uma mais nova
+_trava_arquivo = threading.Lock()
+_processo = {'pid': None, 'arquivo': None, 'alterado': False}
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _rotulos(chave, extra=''):
+    tipo, alvo = chave
+    return f'tipo="{_escapar(tipo)}",alvo="{_escapar(alvo)}"{extra}'
+
+def _linhas_histograma(nome, ajuda, histogramas):
+    linhas = [f'# HELP {nome} {ajuda}', f'# TYPE {nome} histogram']
+    for chave, h in sorted(histogramas.items()):
+        acumulado = 0
+        for faixa, n in zip(list(h.faixas) + ['+Inf'], h.contagens):
+            acumulado += n
+            rotulos = _rotulos(chave, ',le="%s"' % faixa)
+            linhas.append(f'{nome}_bucket{{{rotulos}}} {acumulado}')
+        linhas.append(f'{nome}_sum{{{_rotulos(chave)}}} {h.soma}')
+        linhas.append(f'{nome}_count{{{_rotulos(chave)}}} {acumulado}')
+    return linhas
+
+def _arquivo_processo():
+    # Um arquivo por processo; o sufixo aleatório evita herdar o arquivo de
+    # um worker antigo que tinha o mesmo pid
+    with _trava:
+        if _processo['pid'] != os.getpid():
+            _processo['pid'] = os.getpid()
+            _processo['arquivo'] = os.path.join(PASTA_PROCESSOS, f'{os.getpid()}-{os.urandom(4).hex()}.json')
+            threading.Thread(target=_gravar_periodicamente, daemon=True).start()
+            atexit.register(_gravar_processo)
+        return _processo['arquivo']
+
+def _gravar_processo():
+    """
+    Grava as contagens deste processo na pasta compartilhada (de forma atômica)
+    """
+    arquivo = _arquivo_processo()
+    with _trava_arquivo:
+        with _trava:
+            estado = {
+                'latencias': [[*chave, list(h.contagens), h.soma] for chave, h in LATENCIAS.items()],
+                'tamanhos': [[*chave, list(h.contagens), h.soma] for chave, h in TAMANHOS.items()],
+                'erros': [[*chave, n] for chave, n in ERROS.items()],
+            }
+            _processo['alterado'] = False
+        os.makedirs(PASTA_PROCESSOS, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=PASTA_PROCESSOS, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(estado, f)
+        os.replace(temporario, arquivo)
+
+def _gravar_periodicamente():
+    while True:
+        time.sleep(INTERVALO_GRAVACAO_S)
+        if _processo['alterado']:
+            _gravar_processo()
+
+def _somar_processos():
+    # Soma os arquivos de todos os processos, inclusive os de workers que já
+    # terminaram: assim os contadores nunca voltam para trás
+    latencias = defaultdict(lambda: Histograma(FAIXAS_LATENCIA))
+    tamanhos = defaultdict(lambda: Histograma(FAIXAS_BYTES))
+    erros = defaultdict(int)
+    for entrada in os.scandir(PASTA_PROCESSOS):
+        if not entrada.name.endswith('.json'):
+            continue
+        try:
+            with open(entrada.path) as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            continue
+        for destino, nome in ((latencias, 'latencias'), (tamanhos, 'tamanhos')):
+            for tipo, alvo, contagens, soma in estado[nome]:
+                h = destino[tipo, alvo]
+                h.contagens = [a + b for a, b in zip(h.contagens, contagens)]
+                h.soma += soma
+        for tipo, alvo, n in estado['erros']:
+            erros[tipo, alvo] += n
+    return latencias, tamanhos, erros
+
+def limpar_metricas_processos():
+    """
+    Apaga as contagens de uma execução anterior; chamada pelo processo
+    principal antes de criar os workers
+    """
+    if PASTA_PROCESSOS and os.path.isdir(PASTA_PROCESSOS):
+        for entrada in os.scandir(PASTA_PROCESSOS):
+            os.remove(entrada.path)
+
+def texto_metricas():
+    """
+    Todas as métricas no formato texto do Prometheus (somadas entre os
+    processos se METRICAS_PASTA_PROCESSOS estiver definida)
+    """
+    if PASTA_PROCESSOS:
+        _gravar_processo()
+        latencias, tamanhos, erros = _somar_processos()
+    else:
+        latencias, tamanhos, erros = LATENCIAS, TAMANHOS, ERROS
+    with _trava:
+        linhas = _linhas_histograma('dashboard_latencia_segundos',
+                                    'Tempo de resposta por callback do Dash ou rota do Flask', latencias)
+        linhas += _linhas_histograma('dashboard_resposta_bytes', 'Tamanho das respostas em bytes', tamanhos)
+        linhas += ['# HELP dashboard_erros_total Respostas com erro (status >= 500 ou exceção)',
+                   '# TYPE dashboard_erros_total counter']
+        linhas += [f'dashboard_erros_total{{{_rotulos(chave)}}} {n}' for chave, n in sorted(erros.items())]
+    return '\n'.join(linhas) + '\n'
+
+def _alvo(app):
+    # Callbacks do Dash passam todos pela mesma rota; o nome vem do output pedido
+    if request.path == ROTA_CALLBACKS:
+        corpo = request.get_json(silent=True) or {}
+        callback = app.callback_map.get(corpo.get('output'), {}).get('callback')
+        return 'callback', getattr(callback, '__name__', corpo.get('output', '?'))
+    regra = request.url_rule.rule if request.url_rule else 'sem_rota'
+    return 'rota', regra
+
+def _guardar_perfil(perfil, alvo, duracao):
+    os.makedirs(PASTA_PERFIS, exist_ok=True)
+    nome = f'{alvo[1].strip("/").replace("/", "_") or "raiz"}-{time.strftime("%Y%m%d-%H%M%S")}-{int(duracao * 1000)}ms.prof'
+    perfil.dump_stats(os.path.join(PASTA_PERFIS, nome))
+    perfis = sorted(os.scandir(PASTA_PERFIS), key=lambda e: e.stat().st_mtime)
+    for entrada in perfis[:max(0, len(perfis) - LIMITE_PERFIS)]:
+        os.remove(entrada.path)
+
+def registrar_metricas(app):
+    """
+    Instrumenta o servidor Flask da app Dash e registra a rota /metrics
+    """
+    server = app.server
+
+    @server.before_request
+    def iniciar_medicao():
+        g.inicio_metricas = time.perf_counter()
+        g.perfil = None
+        if PASTA_PROCESSOS:
+            _arquivo_processo()
+        if AMOSTRA_PERFIL > 0 and request.path != ROTA_METRICAS and random.random() < AMOSTRA_PERFIL:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+                g.perfil = perfil
+            except ValueError:
+                # Outro perfil já está ativo neste processo
+                pass
+
+    @server.after_request
+    def registrar_resposta(resposta):
+        inicio = g.pop('inicio_metricas', None)
+        if inicio is None or request.path == ROTA_METRICAS:
+            return resposta
+        duracao = time.perf_counter() - inicio
+        alvo = _alvo(app)
+        tamanho = resposta.calculate_content_length()
+        if tamanho is None and not resposta.is_streamed:
+            tamanho = len(resposta.get_data())
+        with _trava:
+            LATENCIAS[alvo].observar(duracao)
+            if tamanho is not None:
+                TAMANHOS[alvo].observar(tamanho)
+            if resposta.status_code >= 500:
+                ERROS[alvo] += 1
+            _processo['alterado'] = True
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            perfil.disable()
+            if duracao >= PERFIL_MINIMO_S:
+                _guardar_perfil(perfil, alvo, duracao)
+        return resposta
+
+    @server.teardown_request
+    def registrar_excecao(erro):
+        # Exceções não tratadas não passam pelo after_request
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            perfil.disable()
+        if erro is not None and g.pop('inicio_metricas', None) is not None:
+            with _trava:
+                ERROS[_alvo(app)] += 1
+                _processo['alterado'] = True
+
+    @server.route(ROTA_METRICAS)
+    def metricas():
+        return Response(texto_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
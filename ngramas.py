@@ -0,0 +1,172 @@
+# Expressões frequentes (bigramas e trigramas) e colocações
+# Os n-gramas são contados sobre os ids das palavras do snapshot: cada
+# n-grama vira um único inteiro (w1*V + w2, (w1*V + w2)*V + w3, ...) e a
+# contagem é um np.unique sobre esses códigos, numa passada vetorizada.
+# Os n-gramas não atravessam linhas (cada linha é de um só falante) e usam só
+# as palavras relevantes (sem stopwords), mas só juntam palavras que eram
+# vizinhas no texto: uma stopword removida entre duas quebra o n-grama. Para cada um são calculadas a PMI e
+# a log-verossimilhança (G² de Dunning) entre o começo e a última palavra.
+# Os resultados ficam no cache de artefatos, por debate e por falante.
+# Execute com: python ngramas.py [--n 2] [--falante adriana] [--ordem llr] [--top 20]
+# Requer: numpy
+
+import argparse
+import io
+
+import numpy as np
+
+from cache_artefatos import artefato, chave_artefato
+
+VERSAO_NGRAMAS = 2
+MINIMO_OCORRENCIAS = 3
+# Critérios de ordenação das expressões
+ORDENS = {'contagens': 'Frequência', 'llr': 'Log-verossimilhança', 'pmi': 'PMI'}
+
+def contar_ngramas(tokens, offsets, n, tamanho_vocabulario, mascara_linhas=None, posicoes=None):
+    """
+    (códigos, contagens) dos n-gramas dentro de cada linha, com os códigos em
+    ordem crescente. Com mascara_linhas, só as linhas marcadas entram; com
+    posicoes (posição de cada token no texto original), só tokens vizinhos
+    """
+    if tamanho_vocabulario ** n >= 2 ** 63:
+        raise ValueError(f'vocabulário grande demais para codificar {n}-gramas em 64 bits')
+    tokens = np.asarray(tokens, dtype=np.int64)
+    tamanhos = np.diff(offsets)
+    inicios = len(tokens) - n + 1
+    if inicios <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    linha_token = np.repeat(np.arange(len(tamanhos), dtype=np.int32), tamanhos)
+    # Começa um n-grama em i se a sua última palavra ainda está na mesma linha
+    validos = linha_token[:inicios] == linha_token[n - 1:]
+    if posicoes is not None:
+        # ...e se nenhuma palavra foi removida entre a primeira e a última
+        posicoes = np.asarray(posicoes)
+        validos &= posicoes[n - 1:] - posicoes[:inicios] == n - 1
+    if mascara_linhas is not None:
+        validos &= np.asarray(mascara_linhas)[linha_token[:inicios]]
+    comecos = np.flatnonzero(validos)
+    codigos = tokens[comecos]
+    for j in range(1, n):
+        codigos = codigos * tamanho_vocabulario + tokens[comecos + j]
+    return np.unique(codigos, return_counts=True)
+
+def _xlnx(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(x > 0, x * np.log(np.where(x > 0, x, 1)), 0.0)
+
+def log_verossimilhanca(k11, k12, k21, k22):
+    """
+    G² de Dunning para tabelas 2x2 (vetorizado). Positivo quando k11 passa
+    do esperado (as partes aparecem juntas mais que o acaso), negativo se não
+    """
+    linhas = (k11 + k12, k21 + k22)
+    colunas = (k11 + k21, k12 + k22)
+    total = k11 + k12 + k21 + k22
+    g2 = 2 * (_xlnx(k11) + _xlnx(k12) + _xlnx(k21) + _xlnx(k22)
+              - _xlnx(linhas[0]) - _xlnx(linhas[1]) - _xlnx(colunas[0]) - _xlnx(colunas[1]) + _xlnx(total))
+    esperado = linhas[0] * colunas[0] / np.maximum(total, 1)
+    return np.where(k11 >= esperado, 1, -1) * np.maximum(g2, 0)
+
+def estatisticas_ngramas(tokens, offsets, n, tamanho_vocabulario, mascara_linhas=None, minimo=MINIMO_OCORRENCIAS,
+                         posicoes=None):
+    """
+    Estatísticas dos n-gramas com pelo menos `minimo` ocorrências:
+      palavras  - matriz (k, n) com os ids das palavras de cada n-grama
+      contagens - ocorrências
+      pmi       - log2 de p(n-grama) / (p(w1) ... p(wn))
+      llr       - G² entre o começo (w1..wn-1) e a última palavra
+    """
+    codigos, contagens = contar_ngramas(tokens, offsets, n, tamanho_vocabulario, mascara_linhas, posicoes)
+    total = int(contagens.sum())
+
+    # Frequência de cada palavra nas mesmas linhas
+    tokens = np.asarray(tokens)
+    if mascara_linhas is not None:
+        tokens = tokens[np.repeat(np.asarray(mascara_linhas), np.diff(offsets))]
+    unigramas = np.bincount(tokens, minlength=tamanho_vocabulario)
+
+    # Quantos n-gramas começam com o mesmo prefixo e quantos terminam na mesma palavra
+    prefixos = codigos // tamanho_vocabulario
+    ultimas = codigos % tamanho_vocabulario
+    # codigos está ordenado, então prefixos iguais são vizinhos
+    _, grupo_prefixo = np.unique(prefixos, return_inverse=True)
+    com_prefixo = np.bincount(grupo_prefixo, weights=contagens)[grupo_prefixo]
+    com_ultima = np.bincount(ultimas, weights=contagens, minlength=tamanho_vocabulario)[ultimas]
+
+    frequentes = contagens >= minimo
+    codigos, contagens = codigos[frequentes], contagens[frequentes]
+    com_prefixo, com_ultima = com_prefixo[frequentes], com_ultima[frequentes]
+
+    palavras = np.empty((len(codigos), n), dtype=np.int32)
+    resto = codigos.copy()
+    for j in range(n - 1, -1, -1):
+        palavras[:, j] = resto % tamanho_vocabulario
+        resto //= tamanho_vocabulario
+
+    n_palavras = max(int(unigramas.sum()), 1)
+    pmi = np.log2(contagens / max(total, 1))
+    for j in range(n):
+        pmi -= np.log2(unigramas[palavras[:, j]] / n_palavras)
+    llr = log_verossimilhanca(contagens, com_prefixo - contagens, com_ultima - contagens,
+                              total - com_prefixo - com_ultima + contagens)
+    return {'palavras': palavras, 'contagens': contagens, 'pmi': pmi, 'llr': llr}
+
+def ngramas_snapshot(snapshot, n, falante=None, minimo=MINIMO_OCORRENCIAS):
+    """
+    Estatísticas dos n-gramas do debate (ou só das falas de um falante),
+    calculadas uma vez e guardadas no cache de artefatos
+    """
+    parametros = {'versao': VERSAO_NGRAMAS, 'n': n, 'falante': falante, 'minimo': minimo}
+    chave = chave_artefato(snapshot['meta']['hash'], 'ngramas', parametros)
+
+    def calcular():
+        mascara = None
+        if falante is not None:
+            mascara = np.asarray(snapshot['falantes']) == snapshot['meta']['falantes'].index(falante)
+        estatisticas = estatisticas_ngramas(snapshot['tokens'], snapshot['offsets_tokens'], n,
+                                            len(snapshot['vocabulario']), mascara, minimo,
+                                            snapshot['posicoes_tokens'])
+        buffer = io.BytesIO()
+        np.savez(buffer, **estatisticas)
+        return buffer.getvalue()
+
+    with np.load(io.BytesIO(artefato(chave, calcular))) as dados:
+        return {nome: dados[nome] for nome in dados.files}
+
+def expressoes_principais(estatisticas, vocabulario, ordem='llr', limite=20):
+    """
+    As `limite` expressões com maior valor em `ordem` (contagens, pmi ou llr),
+    como dicionários com expressão, frequência, PMI e log-verossimilhança
+    """
+    valores = estatisticas[ordem]
+    # Empates desfeitos pela frequência
+    melhores = np.lexsort((-estatisticas['contagens'], -valores))[:limite]
+    return [{
+        'expressao': ' '.join(vocabulario[estatisticas['palavras'][i]].tolist()),
+        'frequencia': int(estatisticas['contagens'][i]),
+        'pmi': round(float(estatisticas['pmi'][i]), 2),
+        'llr': round(float(estatisticas['llr'][i]), 1),
+    } for i in melhores]
+
+def main():
+    from snapshot_analise import ARQUIVO_TRANSCRICAO, carregar_snapshot
+
+    parser = argparse.ArgumentParser(description='Expressões mais frequentes e colocações do debate')
+    parser.add_argument('--transcricao', default=ARQUIVO_TRANSCRICAO)
+    parser.add_argument('--n', type=int, default=2, choices=[2, 3], help='palavras por expressão (padrão: 2)')
+    parser.add_argument('--falante', help='só as falas deste falante')
+    parser.add_argument('--ordem', default='llr', choices=list(ORDENS), help='critério de ordenação (padrão: llr)')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--minimo', type=int, default=MINIMO_OCORRENCIAS, help='ocorrências mínimas')
+    args = parser.parse_args()
+
+    snapshot = carregar_snapshot(args.transcricao)
+    if args.falante is not None and args.falante not in snapshot['meta']['falantes']:
+        parser.error(f"falante desconhecido: {args.falante} (opções: {', '.join(snapshot['meta']['falantes'])})")
+    estatisticas = ngramas_snapshot(snapshot, args.n, args.falante, args.minimo)
+    print(f"{'Expressão':<40}{'Freq.':>8}{'PMI':>8}{'LLR':>10}")
+    for e in expressoes_principais(estatisticas, snapshot['vocabulario'], args.ordem, args.top):
+        print(f"{e['expressao']:<40}{e['frequencia']:>8}{e['pmi']:>8.2f}{e['llr']:>10.1f}")
+
+if __name__ == '__main__':
+    main()
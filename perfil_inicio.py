@@ -0,0 +1,64 @@
+# Medição do tempo de inicialização (PERFIL_INICIO=1)
+# Registra quanto cada fase da inicialização e cada import demoraram e
+# imprime um relatório no final. Precisa ser importado antes dos módulos
+# pesados para ver os imports deles; desligado, não faz nada.
+
+import builtins
+import os
+import sys
+import time
+
+ATIVO = os.environ.get('PERFIL_INICIO') == '1'
+LIMITE_IMPORTS = 20
+
+INICIO = time.perf_counter()
+_ultima_marca = INICIO
+FASES = []    # (nome, segundos)
+IMPORTS = {}  # módulo -> (segundos, incluindo os imports que ele fez; profundidade)
+_importar_original = builtins.__import__
+_profundidade = 0
+
+def _importar_medindo(nome, globals=None, locals=None, fromlist=(), level=0):
+    global _profundidade
+    if level or nome in sys.modules:
+        return _importar_original(nome, globals, locals, fromlist, level)
+    inicio = time.perf_counter()
+    _profundidade += 1
+    try:
+        return _importar_original(nome, globals, locals, fromlist, level)
+    finally:
+        _profundidade -= 1
+        IMPORTS.setdefault(nome, (time.perf_counter() - inicio, _profundidade))
+
+if ATIVO:
+    builtins.__import__ = _importar_medindo
+
+def marcar_fase(nome):
+    """
+    Encerra uma fase da inicialização: o tempo desde a marca anterior
+    (ou desde o import deste módulo) fica registrado com este nome
+    """
+    global _ultima_marca
+    if not ATIVO:
+        return
+    agora = time.perf_counter()
+    FASES.append((nome, agora - _ultima_marca))
+    _ultima_marca = agora
+
+def relatorio_inicio(arquivo=sys.stderr):
+    """
+    Imprime as fases e os imports mais lentos, e para de medir os imports
+    """
+    if not ATIVO:
+        return
+    builtins.__import__ = _importar_original
+    total = time.perf_counter() - INICIO
+    print(f'\n--- Inicialização: {total:.3f}s ---', file=arquivo)
+    print('Fases:', file=arquivo)
+    for nome, segundos in FASES:
+        print(f'  {nome:<40}{segundos:>8.3f}s', file=arquivo)
+    print('Imports mais lentos (tempo inclui os imports feitos por eles; nível 0 = import direto):', file=arquivo)
+    lentos = sorted(IMPORTS.items(), key=lambda item: -item[1][0])[:LIMITE_IMPORTS]
+    for nome, (segundos, profundidade) in lentos:
+        print(f'  {nome:<40}{segundos:>8.3f}s  nível {profundidade}', file=arquivo)
+    print('', file=arquivo)
@@ -0,0 +1,74 @@
+# Processamento da transcrição em streaming, com memória constante
+# As linhas passam por um gerador (timestamp -> falante -> contagem de palavras)
+# e só contadores e offsets ficam em memória, nunca o texto: o consumo é o
+# mesmo para um debate ou para uma temporada inteira de transcrições.
+
+from array import array
+from collections import Counter
+
+from analise_transcricao import REGEX_TIMESTAMP, tokenizar_linha
+from falantes import MATCHER_FALANTES, PADROES_FALANTES, rotular_falantes
+
+def ler_linhas(caminho):
+    """
+    Gera (offset em bytes, linha) lendo o arquivo aos poucos
+    """
+    with open(caminho, 'rb') as f:
+        offset = 0
+        for bruta in f:
+            yield offset, bruta.decode('utf-8')
+            offset += len(bruta)
+
+def segundos_timestamp(linha):
+    """
+    Segundos do primeiro timestamp da linha, ou -1 se não houver
+    """
+    m = REGEX_TIMESTAMP.search(linha)
+    if not m:
+        return -1
+    horas, minutos, segundos = m.groups()
+    return int(horas or 0) * 3600 + int(minutos) * 60 + int(segundos)
+
+def contar_streaming(caminho, stopwords_pt, padroes=PADROES_FALANTES, matcher=MATCHER_FALANTES):
+    """
+    Percorre a transcrição uma única vez, sem guardar o texto.
+    Retorna um dicionário com:
+      contagem          - Counter de todas as palavras
+      contagem_falantes - falante -> Counter das suas palavras
+      falas             - falante -> número de falas
+      offsets           - offset (em bytes) de cada linha no arquivo
+      segundos          - segundos de cada linha (-1 se não houver timestamp)
+      falantes          - código do falante de cada linha (-1 em linhas vazias)
+    """
+    offsets = array('q')
+    segundos = array('i')
+    falantes = array('b')
+    codigos = {candidato: i for i, candidato in enumerate(padroes)}
+    contagem_falantes = {candidato: Counter() for candidato in padroes}
+    falas = Counter()
+
+    def linhas_brutas():
+        for offset, linha in ler_linhas(caminho):
+            offsets.append(offset)
+            segundos.append(segundos_timestamp(linha))
+            yield linha
+
+    for linha_limpa, candidato in rotular_falantes(linhas_brutas(), padroes, matcher):
+        if candidato is None:
+            falantes.append(-1)
+            continue
+        falantes.append(codigos[candidato])
+        falas[candidato] += 1
+        contagem_falantes[candidato].update(tokenizar_linha(linha_limpa, stopwords_pt))
+
+    contagem = Counter()
+    for contagem_falante in contagem_falantes.values():
+        contagem.update(contagem_falante)
+    return {
+        'contagem': contagem,
+        'contagem_falantes': contagem_falantes,
+        'falas': falas,
+        'offsets': offsets,
+        'segundos': segundos,
+        'falantes': falantes,
+    }
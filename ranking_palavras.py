@@ -0,0 +1,123 @@
+# Paginação, ordenação e filtro do ranking de palavras no servidor
+# O ranking fica em arrays já ordenados por frequência, mais um índice em
+# ordem alfabética para os filtros por prefixo; cada página pedida pela
+# tabela só toca as linhas que ela devolve.
+
+import re
+
+import numpy as np
+
+# Um filtro da DataTable é uma lista de condições "{coluna} operador valor" unidas por &&
+REGEX_CONDICAO = re.compile(r'^\s*\{(?P<coluna>[^}]+)\}\s+(?P<operador>\S+)\s*(?P<valor>.*?)\s*$')
+OPERADORES_NUMERICOS = {
+    'gt': '>', '>': '>', 'ge': '>=', '>=': '>=', 'lt': '<', '<': '<', 'le': '<=', '<=': '<=',
+    'eq': '=', '=': '=', 'ne': '!=', '!=': '!=',
+    # Operadores de texto (coluna sem tipo, ou valor digitado com aspas) valem igualdade
+    'contains': '=', 'scontains': '=', 'icontains': '=', 's=': '=', 'i=': '=',
+}
+
+def construir_ranking(palavras, frequencias, ordem_alfabetica=None):
+    """
+    Ranking a partir das palavras em ordem decrescente de frequência.
+    ordem_alfabetica (posições do ranking em ordem alfabética) é calculada se não for passada
+    """
+    palavras = np.asarray(palavras)
+    if ordem_alfabetica is None:
+        ordem_alfabetica = np.argsort(palavras, kind='stable')
+    return {
+        'palavras': palavras,
+        'frequencias': np.asarray(frequencias),
+        'ordem_alfabetica': ordem_alfabetica,
+        'alfabetico': palavras[ordem_alfabetica],
+    }
+
+def interpretar_filtro(filtro):
+    """
+    Converte o filter_query da DataTable numa lista de (coluna, operador, valor)
+    """
+    condicoes = []
+    for parte in (filtro or '').split(' && '):
+        m = REGEX_CONDICAO.match(parte)
+        if not m:
+            continue
+        valor = m.group('valor')
+        if len(valor) >= 2 and valor[0] == valor[-1] and valor[0] in '"\'`':
+            valor = valor[1:-1]
+        condicoes.append((m.group('coluna'), m.group('operador'), valor))
+    return condicoes
+
+def _intervalo_prefixo(alfabetico, prefixo):
+    # [inicio, fim) das palavras que começam com o prefixo, na ordem alfabética
+    inicio = int(np.searchsorted(alfabetico, prefixo, 'left'))
+    fim = int(np.searchsorted(alfabetico, prefixo + '\U0010ffff', 'left'))
+    return inicio, fim
+
+def _faixa_frequencia(frequencias, operador, valor):
+    # [inicio, fim) das posições que atendem à condição: como as frequências
+    # são decrescentes, elas são sempre contíguas (busca binária na vista invertida)
+    n = len(frequencias)
+    crescentes = frequencias[::-1]
+    maiores = n - int(np.searchsorted(crescentes, valor, 'right'))
+    maiores_ou_iguais = n - int(np.searchsorted(crescentes, valor, 'left'))
+    return {
+        '>': (0, maiores), '>=': (0, maiores_ou_iguais),
+        '<': (maiores_ou_iguais, n), '<=': (maiores, n),
+        '=': (maiores, maiores_ou_iguais),
+    }[operador]
+
+def _filtrar_frequencia(frequencias, candidatas, operador, valor):
+    if isinstance(candidatas, range) and operador != '!=':
+        inicio, fim = _faixa_frequencia(frequencias, operador, valor)
+        inicio = max(inicio, candidatas.start)
+        return range(inicio, max(inicio, min(fim, candidatas.stop)))
+    candidatas = np.asarray(candidatas)
+    f = frequencias[candidatas]
+    mascara = {'>': f > valor, '>=': f >= valor, '<': f < valor, '<=': f <= valor,
+               '=': f == valor, '!=': f != valor}[operador]
+    return candidatas[mascara]
+
+def pagina_ranking(ranking, pagina, tamanho, ordenacao=None, filtro=''):
+    """
+    Linhas {'Palavra', 'Frequência'} da página pedida e o total de linhas após o filtro.
+    ordenacao é o sort_by da DataTable; o filtro por palavra busca pelo início da palavra
+    """
+    frequencias = ranking['frequencias']
+    ordem = (ordenacao or [{}])[0]
+    por_palavra = ordem.get('column_id') == 'Palavra'
+    condicoes = interpretar_filtro(filtro)
+
+    # Candidatas: posições do ranking, já na ordem pedida; um range evita
+    # materializar o ranking inteiro quando não há filtro por palavra
+    candidatas = ranking['ordem_alfabetica'] if por_palavra else range(len(frequencias))
+    filtro_palavra = next(((op, v.lower()) for c, op, v in condicoes if c == 'Palavra'), None)
+    if filtro_palavra:
+        operador, prefixo = filtro_palavra
+        inicio, fim = _intervalo_prefixo(ranking['alfabetico'], prefixo)
+        posicoes = ranking['ordem_alfabetica'][inicio:fim]
+        if operador in ('=', 'eq'):
+            posicoes = posicoes[ranking['alfabetico'][inicio:fim] == prefixo]
+        # As posições do ranking seguem a ordem de frequência
+        candidatas = posicoes if por_palavra else np.sort(posicoes)
+
+    for coluna, operador, valor in condicoes:
+        if coluna != 'Frequência':
+            continue
+        operador = OPERADORES_NUMERICOS.get(operador)
+        try:
+            valor = float(valor)
+        except ValueError:
+            operador = None
+        if operador is None:
+            # Condição que não dá para aplicar a um número: nenhuma linha
+            # atende, em vez de ignorar o filtro e devolver o ranking inteiro
+            candidatas = range(0)
+            break
+        candidatas = _filtrar_frequencia(frequencias, candidatas, operador, valor)
+
+    if ordem.get('direction') == ('desc' if por_palavra else 'asc'):
+        candidatas = candidatas[::-1]
+    inicio = pagina * tamanho
+    posicoes = np.asarray(candidatas[inicio:inicio + tamanho], dtype=np.int64)
+    linhas = [{'Palavra': p, 'Frequência': int(f)}
+              for p, f in zip(ranking['palavras'][posicoes].tolist(), frequencias[posicoes].tolist())]
+    return linhas, len(candidatas)
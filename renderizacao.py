@@ -0,0 +1,17 @@
+# Renderização de nuvens de palavras em PNG
+# Fica num módulo próprio para poder rodar em processos do pool sem
+# reimportar a dashboard
+# Requer: wordcloud, pillow (importados só na primeira renderização)
+
+import io
+
+def png_nuvem(frequencias, parametros):
+    """
+    Gera a nuvem a partir de um dicionário palavra -> frequência e
+    devolve os bytes do PNG
+    """
+    from wordcloud import WordCloud
+    wc = WordCloud(**parametros).generate_from_frequencies(frequencias)
+    buffer = io.BytesIO()
+    wc.to_image().save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,98 @@
+# Rotas do servidor Flask (por baixo do Dash) para imagens e download
+# As imagens ficam em memória (ou no cache de artefatos) e são servidas por
+# URL, com ETag e Cache-Control, em vez de irem em base64 dentro do layout.
+# Requer: flask (vem com o dash), pillow
+
+import io
+import os
+
+from flask import Response, abort, request, send_file
+from PIL import Image, features
+
+from cache_artefatos import chave_artefato, gravar_artefato, hash_conteudo, ler_artefato
+
+ROTA_IMAGENS = '/imagens'
+ROTA_DOWNLOAD = '/download/transcricao'
+
+ACEITA_WEBP = features.check('webp')
+
+# nome -> {'etag': ..., 'png': bytes, 'webp': bytes (gerado sob demanda)}
+IMAGENS = {}
+
+def registrar_imagem(nome, png):
+    """
+    Guarda o PNG para ser servido em /imagens/<nome> e devolve a URL.
+    A URL leva a versão do conteúdo, então o navegador pode guardá-la para sempre
+    """
+    etag = hash_conteudo(png)[:32]
+    IMAGENS[nome] = {'etag': etag, 'png': png}
+    return f'{ROTA_IMAGENS}/{nome}?v={etag[:12]}'
+
+def _webp(png):
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(png)).save(buffer, format='WEBP', lossless=True)
+    return buffer.getvalue()
+
+def _formato_aceito():
+    return 'webp' if ACEITA_WEBP and 'image/webp' in request.headers.get('Accept', '') else 'png'
+
+def _resposta_imagem(dados, formato, etag):
+    resposta = Response(dados, mimetype=f'image/{formato}')
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    resposta.vary.add('Accept')
+    return resposta.make_conditional(request)
+
+def responder_imagem(imagem):
+    """
+    Resposta HTTP para uma imagem {'etag', 'png'}: WebP (menor) para quem
+    aceita, PNG para os demais navegadores, com ETag e cache longo
+    """
+    formato = _formato_aceito()
+    etag = f"{imagem['etag']}-{formato}"
+    if request.if_none_match.contains_weak(etag):
+        # O navegador já tem a imagem: 304 sem converter nada
+        return _resposta_imagem(b'', formato, etag)
+    if formato not in imagem:
+        imagem[formato] = _webp(imagem['png'])
+    return _resposta_imagem(imagem[formato], formato, etag)
+
+def responder_artefato(chave):
+    """
+    Resposta HTTP para um PNG do cache de artefatos (404 se ainda não foi
+    gerado). O ETag vem da chave, então um 304 não lê nem converte nada; o
+    WebP é convertido uma vez e guardado no cache com chave própria
+    """
+    formato = _formato_aceito()
+    etag = f'{chave[:32]}-{formato}'
+    if request.if_none_match.contains_weak(etag):
+        return _resposta_imagem(b'', formato, etag)
+    chave_webp = chave_artefato(chave, 'webp')
+    dados = ler_artefato(chave_webp) if formato == 'webp' else None
+    if dados is None:
+        dados = ler_artefato(chave)
+        if dados is None:
+            abort(404)
+        if formato == 'webp':
+            dados = _webp(dados)
+            gravar_artefato(chave_webp, dados)
+    return _resposta_imagem(dados, formato, etag)
+
+def registrar_rotas(server, arquivo_transcricao, nome_download='transcricao_debate.txt'):
+    """
+    Registra as rotas de imagens e de download da transcrição no servidor Flask
+    """
+    @server.route(f'{ROTA_IMAGENS}/<nome>')
+    def servir_imagem(nome):
+        imagem = IMAGENS.get(nome)
+        if imagem is None:
+            abort(404)
+        return responder_imagem(imagem)
+
+    @server.route(ROTA_DOWNLOAD)
+    def baixar_transcricao():
+        # Enviado direto do disco, em streaming, com ETag pela data/tamanho do arquivo
+        resposta = send_file(os.path.abspath(arquivo_transcricao), mimetype='text/plain',
+                             as_attachment=True, download_name=nome_download, conditional=True)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
@@ -0,0 +1,75 @@
+# Servidor de produção da dashboard (gunicorn, vários workers)
+# O processo principal importa a dashboard uma única vez (snapshot, imagens,
+# índice de busca) e só depois cria os workers com fork: todos compartilham
+# essas páginas de memória (copy-on-write) em vez de cada um montar a sua
+# cópia. Os arrays do snapshot já são mmap, compartilhados pelo cache de
+# páginas do sistema. Cada worker atende várias requisições em threads.
+# As métricas de /metrics são somadas entre os workers por arquivos em
+# METRICAS_PASTA_PROCESSOS (padrão: .cache/metricas).
+# Execute com: python servidor_producao.py [--workers N] [--threads 4] [--porta 8050]
+# Requer: gunicorn (além das dependências da dashboard)
+
+import argparse
+import gc
+import os
+
+from gunicorn.app.base import BaseApplication
+
+def preparar_estado_compartilhado(dashboard):
+    """
+    Monta antes do fork tudo o que a dashboard só calcularia na primeira
+    requisição, para não ser recalculado (e duplicado) em cada worker
+    """
+    from rotas_arquivos import IMAGENS, responder_imagem
+    dashboard.obter_indice_busca()
+    if dashboard.url_indice_cliente:
+        dashboard.obter_indice_cliente()
+    # Versões WebP das imagens fixas (geradas sob demanda na primeira requisição)
+    with dashboard.app.server.test_request_context(headers={'Accept': 'image/webp'}):
+        for imagem in IMAGENS.values():
+            responder_imagem(imagem)
+
+class ServidorDashboard(BaseApplication):
+    def __init__(self, opcoes):
+        self.opcoes = opcoes
+        super().__init__()
+
+    def load_config(self):
+        for nome, valor in self.opcoes.items():
+            self.cfg.set(nome, valor)
+
+    def load(self):
+        # Com preload_app, roda uma vez no processo principal, antes do fork
+        import dashboard_dash
+        from metricas import limpar_metricas_processos
+        limpar_metricas_processos()
+        preparar_estado_compartilhado(dashboard_dash)
+        # Tira os objetos já carregados do alcance do coletor de lixo: sem
+        # isso, cada coleta nos workers escreve nos cabeçalhos desses objetos
+        # e copia as páginas compartilhadas
+        gc.freeze()
+        return dashboard_dash.server
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a dashboard com gunicorn, com o estado da análise compartilhado')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='número de processos (padrão: um por núcleo)')
+    parser.add_argument('--threads', type=int, default=4, help='threads por processo (padrão: 4)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--porta', type=int, default=8050)
+    parser.add_argument('--timeout', type=int, default=60, help='segundos até um worker travado ser reiniciado')
+    args = parser.parse_args()
+    # Lida por metricas.py quando a dashboard é importada
+    os.environ.setdefault('METRICAS_PASTA_PROCESSOS', os.path.join('.cache', 'metricas'))
+
+    ServidorDashboard({
+        'bind': f'{args.host}:{args.porta}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'timeout': args.timeout,
+    }).run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# Snapshot pré-calculado da análise da transcrição
+# Gera, uma única vez, tudo o que a dashboard precisa (contagens, timestamps,
+# falantes, figuras e nuvens) num diretório de arrays .npy + meta.json.
+# A dashboard só carrega o snapshot (com memory-map) e ele só é refeito
+# quando o hash da transcrição muda.
+# Execute com: python snapshot_analise.py [--jobs N] [--forcar]
+# Requer: numpy, plotly, pandas, wordcloud
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from analise_transcricao import (acumulado_por_minuto, analisar_transcricao, carregar_stopwords, contagem_linhas,
+                                 frequencias_janela, minutos_por_linha, tabela_transcricao)
+from cache_artefatos import artefato, chave_artefato, gravar_artefato, hash_conteudo, ler_artefato
+from falantes import PADROES_FALANTES, rotular_falantes
+from graficos import PARAMETROS_NUVEM_BLOCO, dividir_blocos, duracao_media, grafico_evolucao, grafico_palavras
+from renderizacao import png_nuvem
+
+ARQUIVO_TRANSCRICAO = 'data/transcricao.txt'
+PASTA_SNAPSHOT = os.path.join('.cache', 'snapshot')
+VERSAO_SNAPSHOT = 7
+NOMES_BLOCOS = ['nuvem_bloco1', 'nuvem_bloco2', 'nuvem_bloco3']
+# Nuvem do debate inteiro com os parâmetros dos blocos: é a nuvem do
+# intervalo completo, mostrada ao abrir a dashboard
+NOME_NUVEM_DEBATE = 'nuvem_debate'
+
+# Arrays gravados como .npy (carregados com memory-map)
+ARRAYS = ['texto', 'offsets_linhas', 'segundos', 'falantes', 'vocabulario', 'contagens', 'ordem_alfabetica',
+          'tokens', 'offsets_tokens', 'posicoes_tokens', 'minutos', 'acumulado_minutos']
+
+class LinhasMapeadas:
+    """
+    Sequência das linhas da transcrição lidas sob demanda do buffer
+    mapeado em memória: só as linhas acessadas são decodificadas
+    """
+    def __init__(self, texto, offsets):
+        self.texto = texto
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        # offsets[i + 1] - 1 descarta o '\n' que separa as linhas
+        return self.texto[self.offsets[i]:self.offsets[i + 1] - 1].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def hash_transcricao(arquivo_transcricao):
+    with open(arquivo_transcricao, 'rb') as f:
+        return hash_conteudo(f.read(), f'snapshot-v{VERSAO_SNAPSHOT}')
+
+def _nuvens(chaves, frequencias, jobs):
+    # Reaproveita as nuvens do cache de artefatos; só renderiza as que faltam.
+    # frequencias(i) devolve o dicionário palavra -> frequência da nuvem i
+    pngs = [ler_artefato(chave) for chave in chaves]
+    faltando = [i for i, png in enumerate(pngs) if png is None]
+    entradas = [frequencias(i) for i in faltando]
+    # As nuvens são independentes; com jobs > 1 vão para um pool de processos
+    if jobs > 1 and len(faltando) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(faltando))) as pool:
+            novos = list(pool.map(png_nuvem, entradas, repeat(PARAMETROS_NUVEM_BLOCO)))
+    else:
+        novos = [png_nuvem(f, PARAMETROS_NUVEM_BLOCO) for f in entradas]
+    for i, png in zip(faltando, novos):
+        gravar_artefato(chaves[i], png)
+        pngs[i] = png
+    return pngs
+
+def construir_snapshot(arquivo_transcricao=ARQUIVO_TRANSCRICAO, pasta=PASTA_SNAPSHOT, jobs=1):
+    """
+    Analisa a transcrição e grava o snapshot em pasta/<hash>.
+    Devolve o caminho do snapshot
+    """
+    with open(arquivo_transcricao, 'r', encoding='utf-8') as f:
+        transcricao = f.read()
+    hash_entrada = hash_transcricao(arquivo_transcricao)
+    linhas = transcricao.strip().split('\n')
+
+    stopwords_pt = carregar_stopwords()
+    analise = analisar_transcricao(linhas, stopwords_pt)
+
+    # Vocabulário em ordem de frequência (empates na ordem de aparição):
+    # o id de cada palavra é a sua posição no ranking, e os ids da análise
+    # (ordem de aparição) são renumerados de uma vez
+    contagem = analise['contagem']
+    freq = analise['frequencias']
+    ordem = np.argsort(-freq, kind='stable')
+    vocabulario = np.array(analise['vocabulario'], dtype=str)[ordem]
+    posicao = np.empty(len(ordem), dtype=np.int32)
+    posicao[ordem] = np.arange(len(ordem), dtype=np.int32)
+
+    codigos = {candidato: i for i, candidato in enumerate(PADROES_FALANTES)}
+    falantes = np.fromiter((-1 if c is None else codigos[c] for _, c in rotular_falantes(linhas)),
+                           dtype=np.int8, count=len(linhas))
+    # Timestamps de todas as linhas numa única passada ([MM:SS] ou [HH:MM:SS])
+    tabela = tabela_transcricao(linhas, falantes)
+    segundos = tabela['segundos'].to_numpy()
+
+    texto = np.frombuffer('\n'.join(linhas).encode('utf-8'), dtype=np.uint8)
+    # Início de cada linha no buffer (mais um final fictício após o último '\n')
+    quebras = np.flatnonzero(texto == ord('\n'))
+    arrays = {
+        'texto': texto,
+        'offsets_linhas': np.concatenate([[0], quebras + 1, [len(texto) + 1]]).astype(np.int64),
+        'segundos': segundos,
+        'falantes': tabela['falante'].to_numpy(),
+        'vocabulario': vocabulario,
+        'contagens': freq[ordem],
+        # Índice alfabético do vocabulário, para filtros por prefixo no ranking
+        'ordem_alfabetica': np.argsort(vocabulario, kind='stable'),
+        'tokens': posicao[analise['tokens']],
+        'offsets_tokens': analise['offsets'],
+        # Posição de cada token no texto original, para os n-gramas não juntarem
+        # palavras que tinham uma stopword entre elas
+        'posicoes_tokens': analise['posicoes'],
+    }
+    # Contagens acumuladas por minuto: a frequência de qualquer janela de
+    # tempo sai de uma subtração entre duas linhas da matriz
+    arrays['minutos'] = minutos_por_linha(arrays['segundos'])
+    arrays['acumulado_minutos'] = acumulado_por_minuto(arrays['minutos'], arrays['tokens'],
+                                                       arrays['offsets_tokens'], len(vocabulario))
+
+    parametros_cache = {'versao': 1, 'stopwords': hash_conteudo(*sorted(stopwords_pt))}
+    blocos = dividir_blocos(range(len(linhas)))
+    chaves = [chave_artefato(hash_entrada, 'nuvem_bloco',
+                             {**parametros_cache, **PARAMETROS_NUVEM_BLOCO, 'linhas': [b.start, b.stop]})
+              for b in blocos]
+    chaves.append(chave_artefato(hash_entrada, NOME_NUVEM_DEBATE, {**parametros_cache, **PARAMETROS_NUVEM_BLOCO}))
+
+    def frequencias_nuvem(i):
+        if i < len(blocos):
+            return contagem_linhas(analise, blocos[i].start, blocos[i].stop)
+        # Mesmas contagens que o intervalo completo da dashboard
+        vetor = frequencias_janela(arrays['acumulado_minutos'], 0, len(arrays['acumulado_minutos']) - 2)
+        idx = np.flatnonzero(vetor)
+        return dict(zip(vocabulario[idx].tolist(), vetor[idx].tolist()))
+
+    nuvens = dict(zip(NOMES_BLOCOS + [NOME_NUVEM_DEBATE], _nuvens(chaves, frequencias_nuvem, jobs)))
+    figuras = {
+        'fig_palavras': artefato(chave_artefato(hash_entrada, 'fig_palavras', parametros_cache),
+                                 lambda: grafico_palavras(contagem).to_json().encode('utf-8')),
+        'fig_evolucao': artefato(chave_artefato(hash_entrada, 'fig_evolucao', parametros_cache),
+                                 lambda: grafico_evolucao(segundos).to_json().encode('utf-8')),
+    }
+    meta = {
+        'versao': VERSAO_SNAPSHOT,
+        'hash': hash_entrada,
+        'falantes': list(PADROES_FALANTES),
+        'duracao_media': float(duracao_media(segundos)),
+        'n_linhas': len(linhas),
+    }
+
+    # Grava num diretório temporário e troca de uma vez, para que outro
+    # processo nunca veja um snapshot pela metade
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, hash_entrada)
+    temporario = tempfile.mkdtemp(dir=pasta, prefix='.tmp-')
+    for nome, array in arrays.items():
+        np.save(os.path.join(temporario, f'{nome}.npy'), array)
+    for nome, png in nuvens.items():
+        with open(os.path.join(temporario, f'{nome}.png'), 'wb') as f:
+            f.write(png)
+    for nome, dados in figuras.items():
+        with open(os.path.join(temporario, f'{nome}.json'), 'wb') as f:
+            f.write(dados)
+    with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    try:
+        os.rename(temporario, destino)
+    except OSError:
+        # Outro processo gravou o mesmo snapshot antes
+        shutil.rmtree(temporario, ignore_errors=True)
+
+    # Só o snapshot atual é mantido
+    for nome in os.listdir(pasta):
+        if nome != hash_entrada and not nome.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(pasta, nome), ignore_errors=True)
+    return destino
+
+def carregar_snapshot(arquivo_transcricao=ARQUIVO_TRANSCRICAO, pasta=PASTA_SNAPSHOT):
+    """
+    Carrega o snapshot da transcrição, construindo-o antes se ele não existir
+    ou se a transcrição mudou. Os arrays são abertos com memory-map
+    """
+    destino = os.path.join(pasta, hash_transcricao(arquivo_transcricao))
+    if not os.path.exists(os.path.join(destino, 'meta.json')):
+        destino = construir_snapshot(arquivo_transcricao, pasta)
+
+    snapshot = {nome: np.load(os.path.join(destino, f'{nome}.npy'), mmap_mode='r') for nome in ARRAYS}
+    with open(os.path.join(destino, 'meta.json'), 'r', encoding='utf-8') as f:
+        snapshot['meta'] = json.load(f)
+    for nome in ['fig_palavras', 'fig_evolucao']:
+        with open(os.path.join(destino, f'{nome}.json'), 'r', encoding='utf-8') as f:
+            snapshot[nome] = json.load(f)
+    snapshot['nuvens'] = {}
+    for nome in NOMES_BLOCOS + [NOME_NUVEM_DEBATE]:
+        with open(os.path.join(destino, f'{nome}.png'), 'rb') as f:
+            snapshot['nuvens'][nome] = f.read()
+    snapshot['linhas'] = LinhasMapeadas(snapshot['texto'], snapshot['offsets_linhas'])
+    return snapshot
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o snapshot da análise usado pela dashboard')
+    parser.add_argument('--transcricao', default=ARQUIVO_TRANSCRICAO, help='arquivo da transcrição')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='número de processos para renderizar as nuvens em paralelo (padrão: 1)')
+    parser.add_argument('--forcar', action='store_true', help='reconstrói mesmo se o snapshot estiver atualizado')
+    args = parser.parse_args()
+
+    destino = os.path.join(PASTA_SNAPSHOT, hash_transcricao(args.transcricao))
+    if os.path.exists(os.path.join(destino, 'meta.json')) and not args.forcar:
+        print(f"Snapshot já atualizado: {destino}")
+        return
+    if args.forcar:
+        shutil.rmtree(destino, ignore_errors=True)
+    destino = construir_snapshot(args.transcricao, jobs=args.jobs)
+    print(f"✅ Snapshot gerado: {destino}")
+
+if __name__ == '__main__':
+    main()
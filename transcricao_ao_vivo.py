@@ -0,0 +1,80 @@
+# Acompanhamento da transcrição enquanto o debate acontece
+# O arquivo é lido de forma incremental: a cada atualização só as linhas
+# acrescentadas desde a leitura anterior são processadas, e contagens,
+# linha do tempo e falante atual continuam de onde pararam.
+
+import os
+import threading
+from collections import Counter, deque
+
+from analise_transcricao import tokenizar_linha
+from falantes import MATCHER_FALANTES, PADROES_FALANTES, rotular_falantes
+from processamento_streaming import segundos_timestamp
+
+ULTIMAS_FALAS = 20
+
+class AcompanhamentoTranscricao:
+    """
+    Estado incremental da análise de uma transcrição que ainda está sendo escrita
+    """
+    def __init__(self, caminho, stopwords_pt, padroes=PADROES_FALANTES, matcher=MATCHER_FALANTES):
+        self.caminho = caminho
+        self.stopwords_pt = stopwords_pt
+        self.padroes = padroes
+        self.matcher = matcher
+        self.trava = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.offset = 0              # bytes já processados (sempre no fim de uma linha)
+        self.candidato_atual = next(iter(self.padroes))
+        self.n_linhas = 0
+        self.versao = 0              # muda sempre que chegam linhas novas (é o offset)
+        self.contagem = Counter()
+        self.falas = Counter()
+        self.falas_por_minuto = Counter()
+        self.ultimas = deque(maxlen=ULTIMAS_FALAS)  # (segundos, falante, texto)
+
+    def _ler_novas(self):
+        # Linhas completas acrescentadas desde o último offset; uma linha
+        # ainda sem '\n' fica para a próxima leitura
+        try:
+            tamanho = os.path.getsize(self.caminho)
+        except OSError:
+            return []
+        if tamanho < self.offset:
+            # Arquivo truncado ou substituído: recomeça do início
+            self.reiniciar()
+        if tamanho == self.offset:
+            return []
+        with open(self.caminho, 'rb') as f:
+            f.seek(self.offset)
+            dados = f.read(tamanho - self.offset)
+        fim = dados.rfind(b'\n') + 1
+        self.offset += fim
+        return dados[:fim].decode('utf-8').splitlines()
+
+    def atualizar(self):
+        """
+        Processa as linhas novas do arquivo e devolve quantas eram
+        """
+        with self.trava:
+            novas = self._ler_novas()
+            if not novas:
+                return 0
+            rotuladas = rotular_falantes(novas, self.padroes, self.matcher, self.candidato_atual)
+            for linha, (linha_limpa, candidato) in zip(novas, rotuladas):
+                if candidato is None:
+                    continue
+                self.candidato_atual = candidato
+                segundos = segundos_timestamp(linha)
+                self.falas[candidato] += 1
+                if segundos >= 0:
+                    self.falas_por_minuto[segundos // 60] += 1
+                self.contagem.update(tokenizar_linha(linha_limpa, self.stopwords_pt))
+                self.ultimas.append((segundos, candidato, linha_limpa))
+            self.n_linhas += len(novas)
+            # Derivada do arquivo, e não de quantas leituras houve: com vários
+            # workers, todos que já leram até o mesmo ponto têm a mesma versão
+            self.versao = self.offset
+            return len(novas)